@@ -70,6 +70,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'dashboard.navbar_counts.NavbarCountsMiddleware',
 ]
 
 ROOT_URLCONF = 'analytics_dashboard.urls'
@@ -85,6 +86,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'dashboard.context_processors.cart_and_wishlist_counts',
+                'products.context_processors.category_navigation',
             ],
         },
     },
@@ -256,3 +258,50 @@ CART_SESSION_ID = 'cart'
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
+
+# Product search
+# Each worker rebuilds its in-process search index after this many seconds so
+# edits made through other processes are picked up.
+SEARCH_INDEX_MAX_AGE = config('SEARCH_INDEX_MAX_AGE', default=300, cast=int)
+# Search results are cached per normalized query in each worker (LRU + TTL);
+# set SEARCH_CACHE_ALIAS to a CACHES alias to share them between workers.
+# The database search backends skip the per-worker LRU and only cache results
+# in SEARCH_CACHE_ALIAS, so without one every search queries the database.
+SEARCH_CACHE_MAX_ENTRIES = config('SEARCH_CACHE_MAX_ENTRIES', default=512, cast=int)
+SEARCH_CACHE_TIMEOUT = config('SEARCH_CACHE_TIMEOUT', default=300, cast=int)
+SEARCH_CACHE_ALIAS = config('SEARCH_CACHE_ALIAS', default=None)
+# Backend used by storefront and API search: InMemorySearchBackend (default),
+# SQLiteFTS5SearchBackend or MySQLFullTextSearchBackend from products.search_backends.
+# Run `manage.py rebuild_search_index` after switching to a database backend.
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='products.search_backends.InMemorySearchBackend')
+
+# Product popularity (manage.py refresh_popularity): order volume is counted
+# over the last POPULARITY_WINDOW_DAYS, halving in weight every
+# POPULARITY_HALF_LIFE_DAYS.
+POPULARITY_WINDOW_DAYS = config('POPULARITY_WINDOW_DAYS', default=180, cast=int)
+POPULARITY_HALF_LIFE_DAYS = config('POPULARITY_HALF_LIFE_DAYS', default=30, cast=int)
+
+# Product detail page fragments are cached for at most this many seconds;
+# product, image and review edits invalidate them earlier in every worker
+# (fragments are keyed on versions stored in the database, not the cache).
+PRODUCT_FRAGMENT_CACHE_TIMEOUT = config('PRODUCT_FRAGMENT_CACHE_TIMEOUT', default=3600, cast=int)
+# The review list and related products fragments also show data from other
+# rows (reviewer names, related products from the category fallback) that
+# bump nothing when edited, so they expire after this many seconds instead.
+PRODUCT_SHARED_FRAGMENT_CACHE_TIMEOUT = config('PRODUCT_SHARED_FRAGMENT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Product image variants (products.images) are resized in this many worker
+# processes; 0 renders them inline in the saving request instead.
+IMAGE_VARIANT_WORKERS = config('IMAGE_VARIANT_WORKERS', default=2, cast=int)
+
+# The home page storefront snapshot is rebuilt at least this often (seconds),
+# and sooner when a banner is scheduled to start or end.
+STOREFRONT_SNAPSHOT_TIMEOUT = config('STOREFRONT_SNAPSHOT_TIMEOUT', default=600, cast=int)
+
+# The banner schedule is cached until the next banner starts or ends, and
+# at most this many seconds.
+BANNER_SCHEDULE_TIMEOUT = config('BANNER_SCHEDULE_TIMEOUT', default=3600, cast=int)
+
+# The cached category tree (products.category_tree) is rebuilt at least this
+# often (seconds); category edits replace it as soon as they commit.
+CATEGORY_TREE_CACHE_TIMEOUT = config('CATEGORY_TREE_CACHE_TIMEOUT', default=3600, cast=int)
@@ -15,4 +15,5 @@ urlpatterns = [
     path('wishlist/', api_views.WishlistAPI.as_view(), name='wishlist_api'),
     path('wishlist/add/', api_views.AddToWishlistAPI.as_view(), name='add_to_wishlist_api'),
     path('wishlist/remove/', api_views.RemoveFromWishlistAPI.as_view(), name='remove_from_wishlist_api'),
+    path('counts/', api_views.NavbarCountsAPI.as_view(), name='navbar_counts_api'),
 ]
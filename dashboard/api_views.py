@@ -1,11 +1,16 @@
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 from products.models import Product, Category, Brand
+from .filters import ProductSearchFilter
 from .models import Cart, CartItem
+from .navbar_counts import current_navbar_counts, navbar_counts_changed
 from user_management.models import Wishlist
 from .serializers import (
     ProductSerializer, CategorySerializer, BrandSerializer,
@@ -13,19 +18,24 @@ from .serializers import (
 )
 
 
+def _serialized_products():
+    """Products with everything ProductSerializer reads, loaded in bulk."""
+    return Product.objects.for_cards().prefetch_related('images')
+
+
 class ProductListAPI(generics.ListAPIView):
     """API view for listing products with filtering"""
-    queryset = Product.objects.filter(is_active=True).select_related('brand', 'category')
+    queryset = _serialized_products().filter(is_active=True)
     serializer_class = ProductSerializer
+    filter_backends = [ProductSearchFilter]
     filterset_fields = ['category', 'brand', 'product_type', 'is_featured', 'is_bestseller']
-    search_fields = ['name', 'description', 'brand__name', 'category__name']
     ordering_fields = ['price', 'created_at', 'name']
     ordering = ['-created_at']
 
 
 class ProductDetailAPI(generics.RetrieveAPIView):
     """API view for product detail"""
-    queryset = Product.objects.filter(is_active=True).select_related('brand', 'category')
+    queryset = _serialized_products().filter(is_active=True)
     serializer_class = ProductSerializer
     lookup_field = 'slug'
 
@@ -49,9 +59,38 @@ class CartAPI(generics.RetrieveAPIView):
     
     def get_object(self):
         cart, created = Cart.objects.get_or_create(user=self.request.user)
+        prefetch_related_objects(
+            [cart], Prefetch('items__product', queryset=_serialized_products())
+        )
         return cart
 
 
+class NavbarCountsAPI(generics.GenericAPIView):
+    """
+    Cart and wishlist badge counts, from the navbar counts cookie (or one
+    count when it cannot be trusted). Responses carry an ETag, so polling
+    unchanged counts gets a 304.
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request, *args, **kwargs):
+        counts = current_navbar_counts(request)
+        etag = quote_etag(f"{counts['cart']}-{counts['wishlist']}")
+        
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'cart_count': counts['cart'],
+                'wishlist_count': counts['wishlist'],
+            })
+        response['ETag'] = etag
+        # Counts are per visitor: never share them, always revalidate
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+
 class AddToCartAPI(generics.GenericAPIView):
     """API view for adding items to cart"""
     permission_classes = [IsAuthenticated]
@@ -84,6 +123,7 @@ class AddToCartAPI(generics.GenericAPIView):
         if not created:
             cart_item.quantity += quantity
             cart_item.save()
+        navbar_counts_changed(request)
         
         return Response({
             'success': True,
@@ -114,6 +154,7 @@ class RemoveFromCartAPI(generics.GenericAPIView):
             )
         
         cart_item.delete()
+        navbar_counts_changed(request)
         
         cart = request.user.carts.first()
         return Response({
@@ -139,14 +180,14 @@ class UpdateCartItemAPI(generics.GenericAPIView):
             )
         
         try:
-            cart_item = CartItem.objects.get(id=item_id, cart__user=request.user)
+            cart_item = CartItem.objects.select_related('cart', 'product').get(id=item_id, cart__user=request.user)
         except CartItem.DoesNotExist:
             return Response(
                 {'success': False, 'message': 'Cart item not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        cart = request.user.carts.first()
+        cart = cart_item.cart
         
         if quantity <= 0:
             cart_item.delete()
@@ -157,17 +198,16 @@ class UpdateCartItemAPI(generics.GenericAPIView):
             cart_item.save()
             message = 'Quantity updated'
             item_total = float(cart_item.total_price)
+        navbar_counts_changed(request)
         
-        # Refresh cart to get updated totals
-        cart.refresh_from_db()
-        
+        # Totals come from one aggregate query, shared by the three reads below
         return Response({
             'success': True,
             'message': message,
             'item_total': item_total,
-            'cart_total': float(cart.total_amount) if cart else 0,
-            'subtotal': float(cart.subtotal) if cart else 0,
-            'total_items': cart.total_items if cart else 0
+            'cart_total': float(cart.total_amount),
+            'subtotal': float(cart.subtotal),
+            'total_items': cart.total_items
         }, status=status.HTTP_200_OK)
 
 
@@ -177,7 +217,9 @@ class WishlistAPI(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user).select_related('product')
+        return Wishlist.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('product', queryset=_serialized_products())
+        )
 
 
 class AddToWishlistAPI(generics.GenericAPIView):
@@ -208,6 +250,7 @@ class AddToWishlistAPI(generics.GenericAPIView):
         
         if created:
             message = f'{product.name} added to wishlist!'
+            navbar_counts_changed(request)
         else:
             message = f'{product.name} is already in your wishlist!'
         
@@ -237,6 +280,7 @@ class RemoveFromWishlistAPI(generics.GenericAPIView):
             )
             product_name = wishlist_item.product.name
             wishlist_item.delete()
+            navbar_counts_changed(request)
             
             return Response({
                 'success': True,
@@ -6,5 +6,5 @@ class DashboardConfig(AppConfig):
     name = 'dashboard'
 
     def ready(self):
-        # Connect signals for cart merge on login
+        # Connect signals for cart merge on login and storefront snapshot invalidation
         from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Banner schedule: which banners are live per ``banner_type``, and until when.
+
+A banner is live from its ``start_date`` through its ``end_date``. The
+schedule loads every enabled banner in one query, works out the live set
+for each type and the next moment any banner starts or ends, and is cached
+until that moment. Banner reads are then cache hits, and a read after the
+boundary always rebuilds, so an expired promotion is never served. Banner
+edits move the ``banners`` ``CacheVersion``, which every worker checks.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from products.models import CacheVersion
+
+
+SCHEDULE_KEY = 'banners:schedule'
+BANNERS_VERSION = 'banners'
+
+# A banner ending at T is still live at T; it drops out at the next tick
+END_GRACE = timedelta(microseconds=1)
+
+
+def _banner_data(banner):
+    """Render-ready form of a banner."""
+    return {
+        'id': banner.id,
+        'title': banner.title,
+        'subtitle': banner.subtitle,
+        'image': banner.image.url if banner.image else None,
+        'link_url': banner.link_url,
+        'banner_type': banner.banner_type,
+    }
+
+
+class BannerSchedule:
+    """Live banners per type at ``computed_at``, valid until ``expires_at`` (None: no change scheduled)."""
+
+    def __init__(self, active, computed_at, expires_at):
+        self.active = active
+        self.computed_at = computed_at
+        self.expires_at = expires_at
+
+    @classmethod
+    def build(cls, now=None):
+        from .models import Banner
+
+        now = now or timezone.now()
+        active = {}
+        boundaries = []
+        for banner in Banner.objects.filter(is_active=True):
+            if banner.is_live_at(now):
+                active.setdefault(banner.banner_type, []).append(_banner_data(banner))
+            if banner.start_date and banner.start_date > now:
+                boundaries.append(banner.start_date)
+            if banner.end_date and banner.end_date + END_GRACE > now:
+                boundaries.append(banner.end_date + END_GRACE)
+        return cls(active, now, min(boundaries, default=None))
+
+    def is_valid_at(self, now):
+        return self.expires_at is None or now < self.expires_at
+
+    def seconds_valid(self, now, cap):
+        """Cache timeout that ends no earlier than ``expires_at``, at most ``cap`` seconds."""
+        if self.expires_at is None:
+            return cap
+        return max(1, min(cap, math.ceil((self.expires_at - now).total_seconds())))
+
+    def banners(self, banner_type, limit=None):
+        banners = self.active.get(banner_type, [])
+        return banners[:limit] if limit is not None else banners
+
+
+def get_banner_schedule(now=None):
+    """The cached schedule, rebuilt on a miss or once a banner has started or ended."""
+    now = now or timezone.now()
+    version = CacheVersion.current(BANNERS_VERSION)
+    cached = cache.get(SCHEDULE_KEY)
+    if cached is not None and cached['version'] == version and cached['schedule'].is_valid_at(now):
+        return cached['schedule']
+    schedule = BannerSchedule.build(now)
+    cache.set(
+        SCHEDULE_KEY,
+        {'version': version, 'schedule': schedule},
+        schedule.seconds_valid(now, settings.BANNER_SCHEDULE_TIMEOUT),
+    )
+    return schedule
+
+
+def active_banners(banner_type, limit=None, now=None):
+    """Render-ready banners of ``banner_type`` live at ``now``, in display order."""
+    return get_banner_schedule(now).banners(banner_type, limit)
+
+
+def invalidate_banner_schedule():
+    CacheVersion.bump([BANNERS_VERSION])
@@ -0,0 +1,25 @@
+from django.db.models import Case, IntegerField, When
+from rest_framework.filters import BaseFilterBackend
+
+from products.search_backends import get_search_backend
+
+
+class ProductSearchFilter(BaseFilterBackend):
+    """Filter and rank products for ``?search=`` with the configured search backend."""
+    search_param = 'search'
+    max_results = 500
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        product_ids = get_search_backend().search(query, limit=self.max_results)
+        if not product_ids:
+            return queryset.none()
+
+        ranking = Case(
+            *[When(id=product_id, then=rank) for rank, product_id in enumerate(product_ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(id__in=product_ids).order_by(ranking)
@@ -0,0 +1,242 @@
+import io
+import json
+import math
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from products.benchmarking import ADJECTIVES, NOUNS, misspell
+from products.models import Brand, Category, Product
+from products.search import product_index, suggestion_index
+from products.search_backends import get_search_backend
+from products.search_cache import bump_catalog_version, search_cache
+
+
+SKU_PREFIX = "BENCH-"
+SHADES = [
+	"Nude", "Coral", "Berry", "Ivory", "Amber", "Mocha", "Peach", "Plum", "Sand", "Honey",
+]
+PRODUCT_TYPES = [choice for choice, _ in Product.PRODUCT_TYPE_CHOICES]
+QUERY_KINDS = ("prefix", "full_word", "misspelled", "zero_result")
+
+# (label, URL name)
+SEARCH_PATHS = [
+	("dashboard_search", "dashboard:search_products"),
+	("dashboard_suggestions", "dashboard:product_suggestions"),
+	("dashboard_live_search", "dashboard:live_search"),
+	("products_search", "products:search_products"),
+]
+
+
+def percentile(samples, pct):
+	"""Nearest-rank percentile of an already sorted list."""
+	if not samples:
+		return None
+	rank = max(1, math.ceil(pct / 100 * len(samples)))
+	return samples[rank - 1]
+
+
+def build_queries(rng, per_kind):
+	"""A reproducible mix of prefix, full-word, misspelled and zero-result queries."""
+	words = ADJECTIVES + NOUNS
+	queries = {
+		"prefix": [rng.choice(words)[:rng.randint(2, 4)].lower() for _ in range(per_kind)],
+		"full_word": [
+			f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}" if rng.random() < 0.5 else rng.choice(NOUNS)
+			for _ in range(per_kind)
+		],
+		"misspelled": [misspell(rng.choice(NOUNS), rng) for _ in range(per_kind)],
+		"zero_result": [
+			"".join(rng.choice("qxzjvk") for _ in range(6)) + str(rng.randint(0, 999))
+			for _ in range(per_kind)
+		],
+	}
+	return queries
+
+
+class Command(BaseCommand):
+	help = (
+		"Benchmark the storefront search paths (dashboard search, suggestions, live search "
+		"and products search) against synthetic catalogs and print the results as JSON. "
+		"Runs in a throwaway test database and media directory; the configured database "
+		"and MEDIA_ROOT are never touched."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument(
+			"--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+			help="Catalog sizes to benchmark, in synthetic products",
+		)
+		parser.add_argument("--queries", type=int, default=25, help="Queries per kind (prefix, full word, ...)")
+		parser.add_argument("--seed", type=int, default=42)
+		parser.add_argument("--warm-cache", action="store_true", help="Keep the search result cache between queries")
+		parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+
+	def handle(self, *args, **options):
+		sizes = sorted(options["sizes"])
+		if not sizes or sizes[0] <= 0:
+			raise CommandError("--sizes must be positive")
+
+		rng = random.Random(options["seed"])
+		queries = build_queries(rng, options["queries"])
+
+		report = {
+			"backend": type(get_search_backend()).__name__,
+			"queries_per_kind": options["queries"],
+			"seed": options["seed"],
+			"warm_cache": options["warm_cache"],
+			"runs": [],
+		}
+
+		# Seed and measure in a test database that is dropped afterwards (an
+		# in-memory one on SQLite), so nothing is left behind even if the run dies.
+		# Sample images and their variants go to a scratch MEDIA_ROOT, rendered
+		# inline so no resize workers compete with the timed requests.
+		self.stderr.write(self.style.MIGRATE_HEADING("Creating the benchmark database..."))
+		media_root = tempfile.mkdtemp(prefix="benchmark-media-")
+		scratch_settings = override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANT_WORKERS=0)
+		scratch_settings.enable()
+		setup_test_environment()
+		old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+		try:
+			# Base categories and brands come from the regular sample data
+			call_command("populate_sample_data", stdout=io.StringIO())
+			categories = list(Category.objects.filter(is_active=True))
+			brands = list(Brand.objects.filter(is_active=True))
+			for size in sizes:
+				self.stderr.write(self.style.MIGRATE_HEADING(f"Seeding {size} synthetic products..."))
+				self.seed_catalog(size, categories, brands, rng)
+				report["runs"].append({
+					"catalog_size": size,
+					"paths": self.run_paths(queries, options["warm_cache"]),
+				})
+		finally:
+			connection.creation.destroy_test_db(old_name, verbosity=0)
+			teardown_test_environment()
+			scratch_settings.disable()
+			shutil.rmtree(media_root, ignore_errors=True)
+			# The in-process indexes and caches were filled from the benchmark database
+			product_index.invalidate()
+			suggestion_index.invalidate()
+			search_cache.clear()
+			cache.clear()
+
+		output = json.dumps(report, indent=2)
+		if options["output"]:
+			with open(options["output"], "w") as handle:
+				handle.write(output + "\n")
+			self.stderr.write(self.style.SUCCESS(f"Benchmark report written to {options['output']}"))
+		else:
+			self.stdout.write(output)
+
+	def seed_catalog(self, size, categories, brands, rng, batch_size=2000):
+		"""Top the synthetic catalog up to ``size`` products, then rebuild the search indexes."""
+		existing = Product.objects.filter(sku__startswith=SKU_PREFIX).count()
+		for start in range(existing, size, batch_size):
+			products = []
+			for number in range(start + 1, min(start + batch_size, size) + 1):
+				name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(SHADES)}"
+				price = Decimal(rng.randrange(200, 6000, 50))
+				products.append(Product(
+					name=name,
+					slug=f"bench-{number}",
+					sku=f"{SKU_PREFIX}{number:06d}",
+					brand=rng.choice(brands),
+					category=rng.choice(categories),
+					product_type=rng.choice(PRODUCT_TYPES),
+					description=f"{name} for benchmarking.",
+					short_description=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}".lower(),
+					price=price,
+					sale_price=price - 50 if rng.random() < 0.2 else None,
+					is_featured=rng.random() < 0.05,
+					is_bestseller=rng.random() < 0.05,
+				))
+			# bulk_create skips the post_save handlers; the indexes are rebuilt below
+			Product.objects.bulk_create(products)
+		self.rebuild_indexes()
+
+	def rebuild_indexes(self):
+		product_index.invalidate()
+		suggestion_index.invalidate()
+		get_search_backend().rebuild()
+		bump_catalog_version()
+
+	def run_paths(self, queries, warm_cache):
+		client = Client()
+		results = {}
+		for label, url_name in SEARCH_PATHS:
+			url = reverse(url_name)
+			self.stderr.write(f"  {label}")
+
+			# The first request builds the lazy in-process indexes; time it separately
+			started = time.perf_counter()
+			client.get(url, {"q": queries["full_word"][0]})
+			warmup_ms = (time.perf_counter() - started) * 1000
+
+			path_result = {"warmup_ms": round(warmup_ms, 3)}
+			all_latencies, all_query_counts, all_peaks = [], [], []
+			for kind in QUERY_KINDS:
+				latencies, query_counts, peaks = self.measure(client, url, queries[kind], warm_cache)
+				path_result[kind] = self.summarize(latencies, query_counts, peaks)
+				all_latencies += latencies
+				all_query_counts += query_counts
+				all_peaks += peaks
+			path_result["all"] = self.summarize(all_latencies, all_query_counts, all_peaks)
+			results[label] = path_result
+		return results
+
+	def measure(self, client, url, queries, warm_cache):
+		"""
+		Latency and SQL query count per request, then peak Python memory in a
+		second pass so tracemalloc overhead does not skew the timings.
+		"""
+		latencies = []
+		query_counts = []
+		for query in queries:
+			if not warm_cache:
+				bump_catalog_version()
+			with CaptureQueriesContext(connection) as captured:
+				started = time.perf_counter()
+				response = client.get(url, {"q": query})
+				latencies.append((time.perf_counter() - started) * 1000)
+			if response.status_code != 200:
+				raise CommandError(f"{url}?q={query} returned {response.status_code}")
+			query_counts.append(len(captured))
+
+		peaks = []
+		tracemalloc.start()
+		try:
+			for query in queries:
+				if not warm_cache:
+					bump_catalog_version()
+				tracemalloc.reset_peak()
+				baseline = tracemalloc.get_traced_memory()[0]
+				client.get(url, {"q": query})
+				peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+		finally:
+			tracemalloc.stop()
+		return latencies, query_counts, peaks
+
+	def summarize(self, latencies, query_counts, peaks):
+		latencies = sorted(latencies)
+		return {
+			"requests": len(latencies),
+			"p50_ms": round(percentile(latencies, 50), 3),
+			"p95_ms": round(percentile(latencies, 95), 3),
+			"p99_ms": round(percentile(latencies, 99), 3),
+			"mean_ms": round(sum(latencies) / len(latencies), 3),
+			"sql_queries_avg": round(sum(query_counts) / len(query_counts), 2),
+			"sql_queries_max": max(query_counts),
+			"peak_memory_kb": round(max(peaks) / 1024, 1),
+		}
@@ -1,15 +1,31 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
 
+# Session entry holding an anonymous visitor's cart id; it survives the
+# session key change on login, so the guest cart can be merged
+GUEST_CART_SESSION_KEY = 'guest_cart_id'
+
+# SQL form of Product.current_price for a cart item: the sale price when one is set
+ITEM_UNIT_PRICE = Case(
+    When(Q(product__sale_price__isnull=False) & ~Q(product__sale_price=0), then=F('product__sale_price')),
+    default=F('product__price'),
+)
+
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='carts', null=True, blank=True)
     session_key = models.CharField(max_length=40, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Result of the totals aggregate, per instance
+    _totals = None
+    
     class Meta:
         verbose_name = 'Shopping Cart'
         verbose_name_plural = 'Shopping Carts'
@@ -19,14 +35,36 @@ class Cart(models.Model):
             return f"Cart for {self.user.email}"
         return f"Cart {self.id} (Session: {self.session_key})"
     
+    @property
+    def totals(self):
+        """
+        ``{'item_count', 'subtotal'}`` from one aggregate query over the items,
+        kept until the cart is refreshed or one of its items changes.
+        """
+        if self._totals is None:
+            totals = self.items.aggregate(
+                item_count=Coalesce(Sum('quantity'), 0),
+                subtotal=Sum(F('quantity') * ITEM_UNIT_PRICE, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            )
+            totals['subtotal'] = (totals['subtotal'] or Decimal('0')).quantize(Decimal('0.01'))
+            self._totals = totals
+        return self._totals
+    
+    def clear_totals(self):
+        self._totals = None
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.clear_totals()
+    
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.totals['item_count']
     
     @property
     def subtotal(self):
         """Returns the subtotal (same as total_amount for cart)"""
-        return sum(item.total_price for item in self.items.all())
+        return self.totals['subtotal']
     
     @property
     def total_amount(self):
@@ -35,7 +73,7 @@ class Cart(models.Model):
     
     @property
     def is_empty(self):
-        return self.items.count() == 0
+        return self.total_items == 0
 
 
 class CartItem(models.Model):
@@ -88,15 +126,18 @@ class Banner(models.Model):
     def __str__(self):
         return f"{self.title} - {self.banner_type}"
     
-    @property
-    def is_currently_active(self):
-        from django.utils import timezone
-        now = timezone.now()
+    def is_live_at(self, now):
+        """Whether the banner is enabled and ``now`` falls within its schedule."""
         if self.start_date and now < self.start_date:
             return False
         if self.end_date and now > self.end_date:
             return False
         return self.is_active
+    
+    @property
+    def is_currently_active(self):
+        from django.utils import timezone
+        return self.is_live_at(timezone.now())
 
 class ContactMessage(models.Model):
     """Model to store contact form submissions"""
@@ -0,0 +1,140 @@
+"""
+Navbar cart and wishlist counts, carried in a signed cookie.
+
+Every rendered page shows both counts, so reading them from the database
+would cost queries (and, for anonymous visitors, a session) on every
+request. Instead the counts live in a signed cookie bound to its owner (the
+user, or a hash of the anonymous visitor's session key) and stamped with
+``COUNTS_VERSION``. Views that change a cart or wishlist call
+``navbar_counts_changed``; ``NavbarCountsMiddleware`` then recounts once and
+rewrites the cookie on the way out. A missing, tampered, outdated or foreign
+cookie is ignored and replaced the same way.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db.models import Sum
+from django.utils.crypto import salted_hmac
+
+
+COOKIE_NAME = 'navbar_counts'
+COOKIE_SALT = 'dashboard.navbar_counts'
+# Bump to discard every cookie issued in an older format
+COUNTS_VERSION = 1
+
+EMPTY_COUNTS = {'cart': 0, 'wishlist': 0}
+
+
+def _base_request(request):
+    # DRF wraps the HttpRequest; flags must land on the one middleware sees
+    return getattr(request, '_request', request)
+
+
+def _owner(request):
+    """Who the counts belong to, or None for a visitor with nothing to count."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    session_key = request.session.session_key
+    if session_key:
+        return 'session:' + salted_hmac(COOKIE_SALT, session_key).hexdigest()[:16]
+    return None
+
+
+def _cookie_counts(request, owner):
+    """Counts from the cookie if it is intact, current and ``owner``'s, else None."""
+    try:
+        value = request.get_signed_cookie(COOKIE_NAME, salt=COOKIE_SALT, max_age=settings.SESSION_COOKIE_AGE)
+        version, cookie_owner, cart, wishlist = value.split('|')
+        if version == str(COUNTS_VERSION) and cookie_owner == owner:
+            return {'cart': int(cart), 'wishlist': int(wishlist)}
+    except (KeyError, ValueError, signing.BadSignature):
+        pass
+    return None
+
+
+def read_navbar_counts(request):
+    """
+    Counts from the cookie, without touching the database. Anything that
+    cannot be trusted reads as empty and schedules a recount.
+    """
+    owner = _owner(request)
+    if owner is None:
+        return EMPTY_COUNTS
+    counts = _cookie_counts(request, owner)
+    if counts is None:
+        navbar_counts_changed(request)
+        return EMPTY_COUNTS
+    return counts
+
+
+def current_navbar_counts(request):
+    """
+    Counts from the cookie, or counted from the database (and the cookie
+    reissued) when it cannot be trusted.
+    """
+    owner = _owner(request)
+    if owner is None:
+        return EMPTY_COUNTS
+    counts = _cookie_counts(request, owner)
+    if counts is None:
+        counts = count_navbar_items(request)
+        navbar_counts_changed(request, counts)
+    return counts
+
+
+def count_navbar_items(request):
+    """Current counts from the database."""
+    from user_management.models import Wishlist
+    from .models import Cart, CartItem
+
+    if request.user.is_authenticated:
+        carts = Cart.objects.filter(user=request.user)
+        wishlist = Wishlist.objects.filter(user=request.user).count()
+    elif request.session.session_key:
+        carts = Cart.objects.filter(session_key=request.session.session_key, user=None)
+        wishlist = 0
+    else:
+        return dict(EMPTY_COUNTS)
+    # total_items of the first cart, as Cart.objects.filter(...).first() would pick it
+    cart = carts.order_by('pk').values('pk')[:1]
+    items = CartItem.objects.filter(cart__in=cart).aggregate(total=Sum('quantity'))['total']
+    return {'cart': items or 0, 'wishlist': wishlist}
+
+
+def navbar_counts_changed(request, counts=None):
+    """
+    Rewrite the cookie once this request's response is ready, with
+    ``counts`` if they are already known, else recounted then.
+    """
+    request = _base_request(request)
+    request.navbar_counts_changed = True
+    request.navbar_counts = counts
+
+
+def set_navbar_counts_cookie(request, response, counts):
+    owner = _owner(request)
+    if owner is None:
+        response.delete_cookie(COOKIE_NAME)
+        return
+    response.set_signed_cookie(
+        COOKIE_NAME,
+        f"{COUNTS_VERSION}|{owner}|{counts['cart']}|{counts['wishlist']}",
+        salt=COOKIE_SALT,
+        max_age=settings.SESSION_COOKIE_AGE,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+class NavbarCountsMiddleware:
+    """Rewrites the counts cookie for requests flagged by ``navbar_counts_changed``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(request, 'navbar_counts_changed', False):
+            counts = request.navbar_counts or count_navbar_items(request)
+            set_navbar_counts_cookie(request, response, counts)
+        return response
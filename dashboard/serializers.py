@@ -19,7 +19,7 @@ class BrandSerializer(serializers.ModelSerializer):
 class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'is_primary', 'order']
+        fields = ['id', 'image', 'alt_text', 'is_primary', 'order', 'variants']
 
 
 class ProductSerializer(serializers.ModelSerializer):
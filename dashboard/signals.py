@@ -1,34 +1,71 @@
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Cart, CartItem
+from products.models import ProductImage
+from review_system.models import Review
+
+from .models import GUEST_CART_SESSION_KEY, Banner, Cart, CartItem
+from .navbar_counts import navbar_counts_changed
+from .banners import invalidate_banner_schedule
+from .storefront import invalidate_snapshot
 
 
 @receiver(user_logged_in)
 def merge_carts_on_login(sender, user, request, **kwargs):
-    session_key = request.session.session_key
-    if not session_key:
+    # The navbar counts now belong to the user, merged cart or not
+    navbar_counts_changed(request)
+    # login() has already cycled the session key, so the guest cart is found
+    # through the id get_or_create_cart stored in the session data
+    cart_id = request.session.pop(GUEST_CART_SESSION_KEY, None)
+    if not cart_id:
         return
 
-    try:
-        session_cart = Cart.objects.get(session_key=session_key, user=None)
-    except Cart.DoesNotExist:
-        return
+    with transaction.atomic():
+        # Lock both carts: a concurrent login with the same session waits here
+        # and then finds the guest cart gone instead of merging it twice, and
+        # concurrent merges into one user cart cannot overwrite each other's sums
+        session_cart = Cart.objects.select_for_update().filter(pk=cart_id, user=None).first()
+        if session_cart is None:
+            return
+        user_cart, _ = Cart.objects.select_for_update().get_or_create(user=user)
+
+        # One read of both carts; quantities of products in both are summed
+        quantities = {}
+        merged = set()
+        items = CartItem.objects.filter(cart__in=[session_cart, user_cart]).values_list('cart_id', 'product_id', 'quantity')
+        for cart_id, product_id, quantity in items:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+            if cart_id == session_cart.pk:
+                merged.add(product_id)
+
+        if merged:
+            CartItem.objects.bulk_create(
+                [CartItem(cart=user_cart, product_id=product_id, quantity=quantities[product_id]) for product_id in merged],
+                update_conflicts=True,
+                unique_fields=['cart', 'product'],
+                update_fields=['quantity', 'updated_at'],
+            )
+        session_cart.delete()
+
+
+@receiver([post_save, post_delete], sender=CartItem)
+def clear_cart_totals(sender, instance, **kwargs):
+    # The cart instance the item was added through must not keep serving old totals
+    if CartItem.cart.is_cached(instance):
+        instance.cart.clear_totals()
 
-    user_cart, _ = Cart.objects.get_or_create(user=user)
 
-    # Merge items
-    for item in session_cart.items.select_related('product').all():
-        user_item, created = CartItem.objects.get_or_create(
-            cart=user_cart,
-            product=item.product,
-            defaults={'quantity': item.quantity}
-        )
-        if not created:
-            user_item.quantity += item.quantity
-            user_item.save()
+@receiver([post_save, post_delete], sender=Banner)
+def rebuild_banner_schedule(sender, **kwargs):
+    invalidate_banner_schedule()
 
-    # Clear session cart
-    session_cart.items.all().delete()
-    session_cart.delete()
 
+# Product, brand and category edits move the catalog version, which the
+# snapshot already checks; these models change what it shows without doing so
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_storefront_snapshot(sender, **kwargs):
+    invalidate_snapshot()
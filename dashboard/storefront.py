@@ -0,0 +1,114 @@
+"""
+Precomputed storefront snapshot for the home page.
+
+Every block the home page shows (featured, bestseller and new-arrival
+products, hero banners and top categories) is built once into plain,
+render-ready dicts and cached, so a warm home page runs a single query
+(for the versions below).
+
+The snapshot is ignored once the catalog version moves (product, brand and
+category edits) or the storefront version does (banner, product image and
+review changes). Both are ``CacheVersion`` rows, so an edit made in any
+process reaches every worker. It also expires together with the banner schedule it was built
+from, so a scheduled promotion appears and disappears on time.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from products.models import CacheVersion
+from products.search_cache import CATALOG_VERSION
+
+from .banners import get_banner_schedule
+
+
+SNAPSHOT_KEY = 'storefront:snapshot'
+STOREFRONT_VERSION = 'storefront'
+
+FEATURED_LIMIT = 8
+BESTSELLER_LIMIT = 6
+NEW_ARRIVALS_LIMIT = 6
+HERO_BANNER_LIMIT = 3
+CATEGORY_LIMIT = 6
+
+
+def _image_data(image):
+    """What products/picture.html reads from a ProductImage."""
+    if image is None:
+        return None
+    return {
+        'src': image.src,
+        'variants': bool(image.variants),
+        'jpeg_srcset': image.jpeg_srcset,
+        'webp_srcset': image.webp_srcset,
+    }
+
+
+def _product_data(product):
+    image = product.main_product_image
+    return {
+        'id': product.id,
+        'slug': product.slug,
+        'name': product.name,
+        'description': Truncator(product.description).words(15),
+        'price': product.price,
+        'sale_price': product.sale_price,
+        'discount_percentage': product.discount_percentage,
+        'average_rating': product.average_rating,
+        'review_count': product.review_count,
+        'main_image': image.image.url if image else None,
+        'main_product_image': _image_data(image),
+    }
+
+
+def _category_data(category):
+    return {
+        'id': category.id,
+        'name': category.name,
+        'slug': category.slug,
+        'image': category.image.url if category.image else None,
+        'url': category.get_absolute_url(),
+    }
+
+
+def build_snapshot(schedule):
+    """Query and serialize every home page block; banners come from ``schedule``."""
+    from products.models import Category, Product
+
+    products = Product.objects.for_cards().filter(is_active=True)
+    return {
+        'featured_products': [_product_data(p) for p in products.filter(is_featured=True)[:FEATURED_LIMIT]],
+        'bestseller_products': [_product_data(p) for p in products.filter(is_bestseller=True)[:BESTSELLER_LIMIT]],
+        'new_arrivals': [_product_data(p) for p in products.filter(is_new_arrival=True)[:NEW_ARRIVALS_LIMIT]],
+        'hero_banners': schedule.banners('hero', HERO_BANNER_LIMIT),
+        'categories': [
+            _category_data(category)
+            for category in Category.objects.filter(is_active=True, parent=None)[:CATEGORY_LIMIT]
+        ],
+    }
+
+
+def storefront_snapshot():
+    """The cached snapshot, rebuilt on a miss, after a catalog change or at the next banner boundary."""
+    now = timezone.now()
+    versions = CacheVersion.current_many([CATALOG_VERSION, STOREFRONT_VERSION])
+    cached = cache.get(SNAPSHOT_KEY)
+    if (
+        cached is not None and cached['versions'] == versions
+        and (cached['expires_at'] is None or now < cached['expires_at'])
+    ):
+        return cached['snapshot']
+
+    schedule = get_banner_schedule(now)
+    snapshot = build_snapshot(schedule)
+    cache.set(
+        SNAPSHOT_KEY,
+        {'versions': versions, 'expires_at': schedule.expires_at, 'snapshot': snapshot},
+        schedule.seconds_valid(now, settings.STOREFRONT_SNAPSHOT_TIMEOUT),
+    )
+    return snapshot
+
+
+def invalidate_snapshot():
+    CacheVersion.bump([STOREFRONT_VERSION])
@@ -1,3 +1,69 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+
+from .views import _live_search_etag
+
+
+class LiveSearchETagTests(TestCase):
+    def test_every_pager_parameter_changes_the_etag(self):
+        factory = RequestFactory()
+        base = {'q': 'serum', 'after': '', 'before': '', 'per_page': '8', 'sort': ''}
+        etags = {_live_search_etag(factory.get('/search/live/', base))}
+        for name, value in (('after', '12'), ('before', '12'), ('per_page', '4'), ('sort', 'price_asc')):
+            with self.subTest(parameter=name):
+                etag = _live_search_etag(factory.get('/search/live/', dict(base, **{name: value})))
+                self.assertNotIn(etag, etags)
+                etags.add(etag)
+
+
+class BannerScheduleTests(TestCase):
+    def test_banner_edit_reaches_workers_holding_an_old_schedule(self):
+        from django.core.cache import cache
+
+        from .banners import SCHEDULE_KEY, active_banners
+        from .models import Banner
+
+        self.assertEqual(active_banners('hero'), [])
+        stale = cache.get(SCHEDULE_KEY)
+        Banner.objects.create(title='Summer Sale', image='banners/summer.jpg')
+        # Another worker's cache still holds the schedule built before the edit
+        cache.set(SCHEDULE_KEY, stale)
+        self.assertEqual([banner['title'] for banner in active_banners('hero')], ['Summer Sale'])
+
+
+def _files_under(root):
+    return {os.path.join(path, name) for path, _, names in os.walk(root) for name in names}
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class BenchmarkSearchTests(TestCase):
+    def test_run_leaves_media_root_untouched(self):
+        media_root = settings.MEDIA_ROOT
+        files_before = _files_under(media_root)
+        scratch_dirs = []
+        mkdtemp = tempfile.mkdtemp
+
+        def record_mkdtemp(*args, **kwargs):
+            scratch_dirs.append(mkdtemp(*args, **kwargs))
+            return scratch_dirs[-1]
+
+        command = 'dashboard.management.commands.benchmark_search'
+        # The test runner already provides the throwaway database and test environment
+        with mock.patch(f'{command}.setup_test_environment'), \
+                mock.patch(f'{command}.teardown_test_environment'), \
+                mock.patch.object(connection.creation, 'create_test_db'), \
+                mock.patch.object(connection.creation, 'destroy_test_db'), \
+                mock.patch('tempfile.mkdtemp', side_effect=record_mkdtemp):
+            call_command('benchmark_search', sizes=[5], queries=1, stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertEqual(settings.MEDIA_ROOT, media_root)
+        self.assertEqual(_files_under(media_root), files_before)
+        self.assertEqual(len(scratch_dirs), 1)
+        self.assertFalse(os.path.exists(scratch_dirs[0]))
@@ -19,5 +19,6 @@ urlpatterns = [
     path('wishlist/remove/<int:product_id>/', views.remove_from_wishlist, name='remove_from_wishlist'),
     path('search/', views.search_products, name='search_products'),
     path('api/product-suggestions/', views.product_suggestions, name='product_suggestions'),
+    path('api/search/', views.live_search, name='live_search'),
     path('logout/', views.custom_logout, name='logout'),
 ]
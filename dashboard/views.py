@@ -3,13 +3,21 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model, logout
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Q
-from django.utils import timezone
+from django.db.models import Prefetch
+from django.core.files.storage import default_storage
 from django.views.decorators.csrf import ensure_csrf_cookie
-from products.models import Product, Category, Brand
-from .models import Cart, CartItem, Banner
+from django.views.decorators.http import condition, require_GET
+from products.models import Product, Category, Brand, ProductImage
+from products.pagination import paginate_ids, paginate_queryset
+from products.search import normalize_query, suggest_products, hydrate
+from products.search_backends import get_search_backend
+from products.search_cache import catalog_version
+from .models import GUEST_CART_SESSION_KEY, Cart, CartItem
+from .navbar_counts import navbar_counts_changed
+from .storefront import storefront_snapshot
 from user_management.models import Wishlist
 from review_system.models import Review
+import hashlib
 import json
 
 
@@ -33,44 +41,8 @@ def admin_dashboard(request):
 @ensure_csrf_cookie
 def home(request):
     """Homepage view with featured products and banners"""
-    featured_products = Product.objects.filter(
-        is_featured=True, 
-        is_active=True
-    ).select_related('brand', 'category')[:8]
-    
-    bestseller_products = Product.objects.filter(
-        is_bestseller=True, 
-        is_active=True
-    ).select_related('brand', 'category')[:6]
-    
-    new_arrivals = Product.objects.filter(
-        is_new_arrival=True, 
-        is_active=True
-    ).select_related('brand', 'category')[:6]
-    
-    now = timezone.now()
-    hero_banners = (
-        Banner.objects.filter(
-            banner_type='hero',
-            is_active=True
-        )
-        .filter(
-            Q(start_date__isnull=True) | Q(start_date__lte=now),
-            Q(end_date__isnull=True) | Q(end_date__gte=now),
-        )
-        .order_by('order')[:3]
-    )
-    
-    categories = Category.objects.filter(is_active=True, parent=None)[:6]
-    
-    context = {
-        'featured_products': featured_products,
-        'bestseller_products': bestseller_products,
-        'new_arrivals': new_arrivals,
-        'hero_banners': hero_banners,
-        'categories': categories,
-    }
-    
+    # All blocks come render-ready from the cached storefront snapshot
+    context = storefront_snapshot()
     return render(request, 'dashboard/home.html', context)
 
 
@@ -134,32 +106,25 @@ def contact(request):
 
 def search_products(request):
     """
-    Product search view using LINEAR SEARCH algorithm.
-    
-    This implementation performs a case-insensitive linear search by iterating
-    through all products one by one and comparing the search keyword only with
-    the product name. No database queries or full-text search is used.
+    Product search view backed by the configured search backend.
+
+    Query tokens are matched against product name, brand, category and
+    description text, best match first. Only the products on the requested
+    page are loaded.
     """
     query = request.GET.get('q', '').strip()
     
-    # Fetch all active products from the database (one-time fetch)
-    all_products = Product.objects.filter(is_active=True).select_related('brand', 'category')
-    
-    # Initialize list to store matched products
-    matched_products = []
-    
     if query:
-        # LINEAR SEARCH: Loop through all products one by one
-        # This algorithm checks each product name sequentially
-        query_lower = query.lower()  # Convert search query to lowercase for case-insensitive comparison
-        
-        for product in all_products:
-            # Compare the search keyword only with the product name (case-insensitive)
-            if query_lower in product.name.lower():
-                matched_products.append(product)
+        product_ids = get_search_backend().search(query)
+        total_results = len(product_ids)
+        page_obj = paginate_ids(product_ids, request.GET)
+        matched_products = hydrate(page_obj.object_list)
     else:
         # If no query is provided, show all products
-        matched_products = list(all_products)
+        all_products = Product.objects.for_cards().filter(is_active=True)
+        total_results = all_products.count()
+        page_obj = paginate_queryset(all_products, request.GET)
+        matched_products = page_obj.object_list
     
     # Get filter options
     categories = Category.objects.filter(is_active=True)
@@ -167,10 +132,11 @@ def search_products(request):
     
     context = {
         'products': matched_products,
+        'page_obj': page_obj,
         'query': query,
         'categories': categories,
         'brands': brands,
-        'total_results': len(matched_products),
+        'total_results': total_results,
     }
     
     return render(request, 'dashboard/search_results.html', context)
@@ -178,43 +144,119 @@ def search_products(request):
 
 def product_suggestions(request):
     """
-    API endpoint that returns product name suggestions using LINEAR SEARCH.
+    API endpoint that returns product name suggestions for the search bar.
     
     This endpoint is called via AJAX when user types in the search bar.
-    Returns JSON with matching product names (limited to 8 suggestions).
-    
-    Linear search algorithm: Check each product name sequentially for matches.
+    Returns JSON with up to 8 matching product names, most popular first,
+    answered from the in-memory suggestion index (and the search result cache)
+    without touching the database.
     """
     query = request.GET.get('q', '').strip()
     suggestions = []
     
     if query and len(query) >= 2:  # Only search if query has at least 2 characters
-        # Fetch all active products from the database
-        all_products = Product.objects.filter(is_active=True).values('name', 'slug')
-        
-        # Convert query to lowercase for case-insensitive comparison
-        query_lower = query.lower()
-        
-        # LINEAR SEARCH: Loop through all products one by one
-        # This algorithm checks each product name sequentially
-        for product in all_products:
-            # Compare the search keyword only with the product name (case-insensitive)
-            if query_lower in product['name'].lower():
-                suggestions.append({
-                    'name': product['name'],
-                    'slug': product['slug']
-                })
-                # Limit suggestions to 8 results
-                if len(suggestions) >= 8:
-                    break
+        suggestions = suggest_products(query, limit=8)
     
     return JsonResponse({'suggestions': suggestions})
 
 
+LIVE_SEARCH_PAGE_SIZE = 8
+LIVE_SEARCH_MAX_PAGE_SIZE = 20
+
+
+def _live_search_etag(request):
+    """
+    ETag for a live-search response: same catalog version, query and page => same body.
+    
+    The page is every parameter the pager reads. Image URLs and popularity
+    order in the body are covered by the catalog version, which image edits,
+    stored variants and popularity refreshes all bump.
+    """
+    key = '|'.join([
+        str(catalog_version()),
+        normalize_query(request.GET.get('q', '')),
+        request.GET.get('after', ''),
+        request.GET.get('before', ''),
+        request.GET.get('per_page', ''),
+        request.GET.get('sort', ''),
+    ])
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _live_search_results(product_ids):
+    """Compact, ordered projection of products for the live-search dropdown (two queries)."""
+    rows = {
+        row['id']: row
+        for row in Product.objects.filter(id__in=product_ids).values(
+            'id', 'slug', 'name', 'brand__name', 'price', 'sale_price',
+        )
+    }
+    thumbnails = {}
+    images = (
+        ProductImage.objects.filter(product_id__in=product_ids)
+        .order_by('product_id', '-is_primary', 'order', 'created_at')
+        .values_list('product_id', 'image', 'variants')
+    )
+    for product_id, image, variants in images:
+        if product_id not in thumbnails and image:
+            card = variants.get('card')
+            thumbnails[product_id] = card['jpeg'] if card else default_storage.url(image)
+    
+    results = []
+    for product_id in product_ids:
+        row = rows.get(product_id)
+        if row is None:
+            continue
+        results.append({
+            'id': row['id'],
+            'slug': row['slug'],
+            'name': row['name'],
+            'brand': row['brand__name'],
+            'price': str(row['sale_price'] or row['price']),
+            'thumbnail': thumbnails.get(product_id),
+        })
+    return results
+
+
+@require_GET
+@condition(etag_func=_live_search_etag)
+def live_search(request):
+    """
+    JSON endpoint for the live search box.
+    
+    Returns a small page of matching products (id, slug, name, brand, price
+    and thumbnail URL) plus a cursor for the next page. Responses carry an
+    ETag, so repeated queries against an unchanged catalog get a 304.
+    """
+    query = request.GET.get('q', '').strip()
+    results = []
+    total = 0
+    next_cursor = None
+    
+    if query:
+        product_ids = get_search_backend().search(query)
+        total = len(product_ids)
+        page_obj = paginate_ids(
+            product_ids, request.GET,
+            default_size=LIVE_SEARCH_PAGE_SIZE, max_size=LIVE_SEARCH_MAX_PAGE_SIZE,
+        )
+        results = _live_search_results(page_obj.object_list)
+        next_cursor = page_obj.next_cursor
+    
+    return JsonResponse({
+        'query': query,
+        'results': results,
+        'total': total,
+        'next': next_cursor,
+    })
+
+
 def cart_view(request):
     """Shopping cart view"""
     cart = get_or_create_cart(request)
-    cart_items = cart.items.select_related('product').all()
+    cart_items = cart.items.prefetch_related(
+        Prefetch('product', queryset=Product.objects.for_cards())
+    )
     
     context = {
         'cart': cart,
@@ -240,6 +282,7 @@ def add_to_cart(request, product_id):
         if not created:
             cart_item.quantity += quantity
             cart_item.save()
+        navbar_counts_changed(request)
         
         messages.success(request, f'{product.name} added to cart!')
         # Treat fetch() requests as AJAX even if X-Requested-With is not set
@@ -274,6 +317,7 @@ def remove_from_cart(request, item_id):
             product_name = cart_item.product.name
             cart_item.delete()
             messages.success(request, f'{product_name} removed from cart!')
+    navbar_counts_changed(request)
     
     return redirect('dashboard:cart')
 
@@ -291,6 +335,7 @@ def update_cart_item(request, item_id):
         else:
             cart_item.delete()
             messages.success(request, 'Item removed from cart!')
+        navbar_counts_changed(request)
     
     return redirect('dashboard:cart')
 
@@ -298,7 +343,9 @@ def update_cart_item(request, item_id):
 @login_required
 def wishlist_view(request):
     """User wishlist view"""
-    wishlist_items = Wishlist.objects.filter(user=request.user).select_related('product')
+    wishlist_items = Wishlist.objects.filter(user=request.user).prefetch_related(
+        Prefetch('product', queryset=Product.objects.for_cards())
+    )
     
     context = {
         'wishlist_items': wishlist_items,
@@ -319,6 +366,7 @@ def add_to_wishlist(request, product_id):
     
     if created:
         messages.success(request, f'{product.name} added to wishlist!')
+        navbar_counts_changed(request)
     else:
         messages.info(request, f'{product.name} is already in your wishlist!')
     
@@ -334,6 +382,7 @@ def remove_from_wishlist(request, product_id):
         wishlist_item = Wishlist.objects.get(user=request.user, product=product)
         wishlist_item.delete()
         messages.success(request, f'{product.name} removed from wishlist!')
+        navbar_counts_changed(request)
     except Wishlist.DoesNotExist:
         messages.error(request, 'Product not found in wishlist!')
     
@@ -352,6 +401,8 @@ def get_or_create_cart(request):
             session_key=request.session.session_key,
             user=None
         )
+        if request.session.get(GUEST_CART_SESSION_KEY) != cart.pk:
+            request.session[GUEST_CART_SESSION_KEY] = cart.pk
     
     return cart
 
@@ -5,3 +5,7 @@ class OrderManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'order_management'
     verbose_name = 'Order Management'
+
+    def ready(self):
+        # Record verified purchases for items added to delivered orders
+        from . import signals  # noqa: F401
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from order_management.models import PURCHASE_STATUSES, Order, UserProductPurchase
+
+
+class Command(BaseCommand):
+    help = "Fill the verified-purchase ledger from existing delivered orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Orders processed per batch')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Backfilling user product purchases..."))
+        batch_size = options['batch_size']
+        delivered = Order.objects.filter(status__in=PURCHASE_STATUSES).order_by('id')
+        last_id = 0
+        orders = 0
+        before = UserProductPurchase.objects.count()
+        while True:
+            order_ids = list(delivered.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not order_ids:
+                break
+            UserProductPurchase.record_orders(order_ids)
+            orders += len(order_ids)
+            last_id = order_ids[-1]
+            self.stdout.write(f"  {orders} orders processed")
+        added = UserProductPurchase.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(f"Added {added} purchases from {orders} delivered orders."))
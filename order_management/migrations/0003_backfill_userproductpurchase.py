@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+PURCHASE_STATUSES = ('delivered', 'completed')
+
+
+def backfill_purchases(apps, schema_editor):
+    """Record every delivered order already in the database, as UserProductPurchase.record_orders does."""
+    OrderItem = apps.get_model('order_management', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    UserProductPurchase = apps.get_model('order_management', 'UserProductPurchase')
+
+    product_ids = dict(Product.objects.values_list('sku', 'id'))
+    items = (
+        OrderItem.objects.filter(order__status__in=PURCHASE_STATUSES)
+        .order_by('order__created_at', 'order_id')
+        .values_list('order_id', 'order__user_id', 'order__created_at', 'product_sku')
+    )
+    purchases = {}
+    for order_id, user_id, ordered_at, sku in items.iterator():
+        product_id = product_ids.get(sku)
+        if product_id is not None:
+            purchases.setdefault((user_id, product_id), UserProductPurchase(
+                user_id=user_id, product_id=product_id, order_id=order_id, purchased_at=ordered_at,
+            ))
+    UserProductPurchase.objects.bulk_create(purchases.values(), batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order_management', '0002_userproductpurchase'),
+        ('products', '0004_productpopularity'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_purchases, migrations.RunPython.noop),
+    ]
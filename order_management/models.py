@@ -1,9 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
 
+# Order statuses that make the buyer a verified purchaser of the items
+PURCHASE_STATUSES = ('delivered', 'completed')
+
+
 class Order(models.Model):
     ORDER_STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -35,12 +39,29 @@ class Order(models.Model):
     def __str__(self):
         return f"Order {self.order_number} - {self.user.email}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can detect a transition to delivered
+        if 'status' in field_names:
+            instance._stored_status = instance.status
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.order_number:
             # Generate order number: EB + timestamp
             import time
             self.order_number = f"EB{int(time.time())}"
         super().save(*args, **kwargs)
+        
+        stored_status = getattr(self, '_stored_status', None)
+        if self.status in PURCHASE_STATUSES and stored_status not in PURCHASE_STATUSES:
+            # After commit, so items saved in the same transaction (e.g. admin inlines) are included
+            transaction.on_commit(lambda: UserProductPurchase.record_orders([self.pk]))
+        elif stored_status in PURCHASE_STATUSES and self.status not in PURCHASE_STATUSES:
+            # Cancelled or refunded after delivery: no longer a verified purchase
+            transaction.on_commit(lambda: UserProductPurchase.revoke_orders([self.pk]))
+        self._stored_status = self.status
 
 
 class OrderItem(models.Model):
@@ -88,3 +109,81 @@ class ShippingAddress(models.Model):
             # Set all other addresses to non-default
             ShippingAddress.objects.filter(user=self.user, is_default=True).update(is_default=False)
         super().save(*args, **kwargs)
+
+
+class UserProductPurchase(models.Model):
+    """
+    Ledger of products each user has received, one row per (user, product).
+    
+    Filled when an order reaches a delivered status or gains items while in
+    one (and by a data migration and the ``backfill_purchases`` command for
+    existing orders), and emptied again when it leaves that status, so verified-purchase checks are a
+    single unique-index lookup instead of a join over orders and item SKUs.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='product_purchases')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='purchases')
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    purchased_at = models.DateTimeField()
+    
+    class Meta:
+        verbose_name = 'User Product Purchase'
+        verbose_name_plural = 'User Product Purchases'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_user_product_purchase'),
+        ]
+    
+    def __str__(self):
+        return f"User {self.user_id} purchased product {self.product_id}"
+    
+    @classmethod
+    def has_purchased(cls, user, product):
+        """Whether ``user`` has received ``product`` in a delivered order."""
+        if not getattr(user, 'is_authenticated', False):
+            return False
+        return cls.objects.filter(user_id=user.pk, product_id=product.pk).exists()
+    
+    @classmethod
+    def record_orders(cls, order_ids):
+        """Add ledger rows for every item of the given delivered orders. Returns rows attempted."""
+        from products.models import Product
+        items = list(
+            OrderItem.objects.filter(order_id__in=order_ids, order__status__in=PURCHASE_STATUSES)
+            .values_list('order_id', 'order__user_id', 'order__created_at', 'product_sku')
+        )
+        product_ids = dict(
+            Product.objects.filter(sku__in={sku for *_, sku in items}).values_list('sku', 'id')
+        )
+        purchases = {}
+        for order_id, user_id, ordered_at, sku in items:
+            product_id = product_ids.get(sku)
+            if product_id is not None:
+                purchases.setdefault((user_id, product_id), cls(
+                    user_id=user_id, product_id=product_id, order_id=order_id, purchased_at=ordered_at,
+                ))
+        cls.objects.bulk_create(purchases.values(), ignore_conflicts=True)
+        return len(purchases)
+    
+    @classmethod
+    def revoke_orders(cls, order_ids):
+        """
+        Drop the ledger rows recorded from the given orders, which are no
+        longer delivered, then re-record those products from the users' other
+        delivered orders. Returns the number of rows removed.
+        """
+        revoked = list(cls.objects.filter(order_id__in=order_ids).values_list('user_id', 'product_id', 'order_id'))
+        if not revoked:
+            return 0
+        with transaction.atomic():
+            for user_id, product_id, order_id in revoked:
+                cls.objects.filter(user_id=user_id, product_id=product_id, order_id=order_id).delete()
+            from products.models import Product
+            skus = Product.objects.filter(id__in={product_id for _, product_id, _ in revoked}).values('sku')
+            other_orders = (
+                Order.objects.filter(
+                    user_id__in={user_id for user_id, _, _ in revoked},
+                    status__in=PURCHASE_STATUSES, items__product_sku__in=skus,
+                )
+                .exclude(id__in=order_ids).values_list('id', flat=True).distinct()
+            )
+            cls.record_orders(list(other_orders))
+        return len(revoked)
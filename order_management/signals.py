@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import PURCHASE_STATUSES, OrderItem, UserProductPurchase
+
+
+@receiver(post_save, sender=OrderItem)
+def record_item_purchase(sender, instance, **kwargs):
+    # Order.save only records on the transition to delivered; items added to an
+    # order that is already delivered (e.g. created that way by an import) land here
+    if instance.order.status in PURCHASE_STATUSES:
+        order_id = instance.order_id
+        transaction.on_commit(lambda: UserProductPurchase.record_orders([order_id]))
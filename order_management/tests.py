@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .models import Order, OrderItem, UserProductPurchase
+
+
+class UserProductPurchaseTests(TestCase):
+    def setUp(self):
+        from products.models import Brand, Category, Product
+
+        self.user = get_user_model().objects.create_user(username='buyer', password='secret')
+        self.product = Product.objects.create(
+            name='Rose Serum', slug='rose-serum', sku='ROSE-1',
+            brand=Brand.objects.create(name='Bloom', slug='bloom'),
+            category=Category.objects.create(name='Serums', slug='serums'),
+            product_type='skincare', description='Rose serum', price=Decimal('900.00'),
+        )
+
+    def deliver_order(self, number):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                user=self.user, order_number=number, total_amount=Decimal('900.00'),
+                shipping_address='Kathmandu', shipping_phone='9800000000', shipping_email='buyer@example.com',
+            )
+            OrderItem.objects.create(
+                order=order, product_name=self.product.name, product_sku=self.product.sku,
+                quantity=1, unit_price=Decimal('900.00'), total_price=Decimal('900.00'),
+            )
+            order.status = 'delivered'
+            order.save()
+        return order
+
+    def cancel(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'cancelled'
+            order.save()
+
+    def test_cancelled_order_is_no_longer_a_purchase(self):
+        order = self.deliver_order('EB1')
+        self.assertTrue(UserProductPurchase.objects.filter(user=self.user, product=self.product).exists())
+
+        self.cancel(order)
+        self.assertFalse(UserProductPurchase.objects.filter(user=self.user, product=self.product).exists())
+
+    def test_cancelling_one_order_keeps_purchase_from_another(self):
+        first = self.deliver_order('EB1')
+        second = self.deliver_order('EB2')
+
+        self.cancel(first)
+        purchase = UserProductPurchase.objects.get(user=self.user, product=self.product)
+        self.assertEqual(purchase.order_id, second.id)
+
+    def test_items_added_to_an_order_created_as_delivered_are_recorded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(
+                user=self.user, order_number='EB1', status='delivered', total_amount=Decimal('900.00'),
+                shipping_address='Kathmandu', shipping_phone='9800000000', shipping_email='buyer@example.com',
+            )
+        self.assertFalse(UserProductPurchase.objects.filter(user=self.user, product=self.product).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(
+                order=order, product_name=self.product.name, product_sku=self.product.sku,
+                quantity=1, unit_price=Decimal('900.00'), total_price=Decimal('900.00'),
+            )
+        purchase = UserProductPurchase.objects.get(user=self.user, product=self.product)
+        self.assertEqual(purchase.order_id, order.id)
@@ -3,9 +3,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.conf import settings
+from django.db.models import Prefetch
 from .models import Order, OrderItem, ShippingAddress
 from .utils import send_order_confirmation_email
 from dashboard.models import Cart
+from dashboard.navbar_counts import navbar_counts_changed
+from products.models import Product
 from payment_gateway.models import Payment
 from django.utils import timezone
 from datetime import timedelta
@@ -78,6 +81,7 @@ def checkout(request):
 
             # Clear cart
             cart.items.all().delete()
+            navbar_counts_changed(request)
             print(f"Cart cleared")
 
             # Send confirmation email; failures must not block checkout
@@ -101,7 +105,9 @@ def checkout(request):
     
     context = {
         'cart': cart,
-        'cart_items': cart.items.select_related('product').all(),
+        'cart_items': cart.items.prefetch_related(
+            Prefetch('product', queryset=Product.objects.for_cards())
+        ),
         'shipping_addresses': ShippingAddress.objects.filter(user=request.user),
         'KHALTI_PUBLIC_KEY': settings.KHALTI_PUBLIC_KEY,
     }
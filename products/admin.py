@@ -17,6 +17,8 @@ class ProductVariantInline(admin.TabularInline):
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'parent', 'is_active', 'created_at']
+    # Tree order: every category right after its parent
+    ordering = ['path']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'slug']
     prepopulated_fields = {'slug': ('name',)}
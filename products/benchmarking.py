@@ -0,0 +1,27 @@
+"""
+Vocabulary and helpers shared by the search benchmarks
+(``benchmark_fuzzy_search`` and dashboard's ``benchmark_search``).
+"""
+
+ADJECTIVES = [
+    "Hydra", "Velvet", "Silk", "Radiant", "Matte", "Glow", "Pure", "Gentle", "Deep",
+    "Soothing", "Brightening", "Nourishing", "Clarifying", "Firming", "Herbal", "Rose",
+]
+NOUNS = [
+    "Moisturizer", "Serum", "Cleanser", "Toner", "Shampoo", "Conditioner", "Lipstick",
+    "Foundation", "Mascara", "Sunscreen", "Cream", "Lotion", "Mask", "Primer", "Balm",
+]
+BRANDS = ["Himalaya Glow", "Koshi Beauty", "Rare Bliss", "Everest Naturals", "Lumbini Labs"]
+CATEGORIES = ["Skincare", "Makeup", "Haircare", "Fragrance", "Tools & Brushes"]
+
+
+def misspell(word, rng):
+    """Apply one random edit (drop, swap or replace a letter) to a word."""
+    word = word.lower()
+    position = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("drop", "swap", "replace"))
+    if edit == "drop":
+        return word[:position] + word[position + 1:]
+    if edit == "swap":
+        return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word[:position] + rng.choice("aeiousz") + word[position + 1:]
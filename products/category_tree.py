@@ -0,0 +1,77 @@
+"""
+The active category tree, loaded in one query and cached as one structure.
+
+Categories carry a materialized ``path`` (see ``Category``), so ordering by
+it lists every category after its parent and the tree is assembled in a
+single pass. The cached tree answers navigation, breadcrumbs and subtree
+lookups without touching the database; it is rebuilt when the catalog
+version moves, which every committed Category save or delete does, and at
+least every ``CATEGORY_TREE_CACHE_TIMEOUT`` seconds.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .search_cache import catalog_version
+
+
+TREE_KEY = 'categories:tree'
+
+
+class CategoryTree:
+    """Active categories as nested dicts, reachable by id and slug."""
+
+    def __init__(self, rows):
+        self.nodes = {}
+        self.roots = []
+        for category_id, parent_id, name, slug, path, depth in rows:
+            node = {
+                'id': category_id,
+                'name': name,
+                'slug': slug,
+                'url': f'/products/category/{slug}/',
+                'depth': depth,
+                'path': path,
+                'children': [],
+            }
+            self.nodes[category_id] = node
+            if parent_id is None:
+                self.roots.append(node)
+            elif parent_id in self.nodes:
+                self.nodes[parent_id]['children'].append(node)
+            # else: under an inactive category, so hidden from navigation
+        for siblings in [self.roots] + [node['children'] for node in self.nodes.values()]:
+            siblings.sort(key=lambda node: node['name'])
+        self.by_slug = {node['slug']: node for node in self.nodes.values()}
+
+    @classmethod
+    def build(cls):
+        from .models import Category
+
+        rows = (
+            Category.objects.filter(is_active=True).order_by('path')
+            .values_list('id', 'parent_id', 'name', 'slug', 'path', 'depth')
+        )
+        return cls(rows)
+
+    def breadcrumbs(self, category_id):
+        """Nodes from the root down to ``category_id``, or [] for an unknown id."""
+        node = self.nodes.get(category_id)
+        if node is None:
+            return []
+        ids = [int(part) for part in node['path'].split('/')[:-1]]
+        return [self.nodes[ancestor_id] for ancestor_id in ids if ancestor_id in self.nodes]
+
+    def children(self, category_id):
+        node = self.nodes.get(category_id)
+        return node['children'] if node else []
+
+
+def category_tree():
+    """The cached tree, rebuilt on a miss or after a catalog change."""
+    version = catalog_version()
+    cached = cache.get(TREE_KEY)
+    if cached is not None and cached['catalog_version'] == version:
+        return cached['tree']
+    tree = CategoryTree.build()
+    cache.set(TREE_KEY, {'catalog_version': version, 'tree': tree}, settings.CATEGORY_TREE_CACHE_TIMEOUT)
+    return tree
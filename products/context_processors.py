@@ -0,0 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+
+from .category_tree import category_tree
+
+
+def category_navigation(request):
+    """Top-level categories (with their children) for the navbar, read from the cached tree."""
+    return {
+        'nav_categories': SimpleLazyObject(lambda: category_tree().roots),
+    }
@@ -0,0 +1,224 @@
+"""
+Bitset facet engine for storefront product filtering.
+
+Every active product owns one bit position. For each facet value (a
+category, brand, product type, price bucket or boolean attribute) the index
+keeps a Python int with the bits of the matching products set, so a filtered
+result and the counts for every other facet come from a handful of bitwise
+ANDs and popcounts instead of one COUNT query per option. The index is built
+lazily and kept current by the handlers in ``products.signals``.
+"""
+import bisect
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+
+
+# Lower bounds of the price buckets; the last bucket is open ended
+PRICE_BUCKETS = (0, 100, 500, 1000, 2000, 5000, 10000)
+
+ATTRIBUTE_FACETS = ('is_organic', 'is_vegan', 'is_cruelty_free')
+
+FacetResult = namedtuple('FacetResult', ['product_ids', 'counts'])
+
+
+def price_bucket(price):
+    return max(0, bisect.bisect_right(PRICE_BUCKETS, price) - 1)
+
+
+def bit_positions(bits):
+    """Yield the positions of the set bits of a non-negative int."""
+    binary = bin(bits)[:1:-1]
+    position = binary.find('1')
+    while position != -1:
+        yield position
+        position = binary.find('1', position + 1)
+
+
+class FacetIndex:
+    FACETS = ('category', 'brand', 'product_type', 'price') + ATTRIBUTE_FACETS
+
+    def __init__(self, max_age=None):
+        self._lock = threading.RLock()
+        self._max_age = max_age
+        self._reset()
+
+    def _reset(self):
+        self._slots = {}
+        self._free_slots = []
+        # slot -> (product_id, recency, price, {facet: key}) or None
+        self._rows = []
+        self._bitsets = {facet: defaultdict(int) for facet in self.FACETS}
+        self._all = 0
+        self._built_at = None
+
+    # Building and maintenance
+
+    def _load_rows(self, **filters):
+        from .models import Product
+        return Product.objects.filter(is_active=True, **filters).values_list(
+            'id', 'created_at', 'price', 'category_id', 'brand_id', 'product_type',
+            *ATTRIBUTE_FACETS,
+        )
+
+    def build(self):
+        rows = list(self._load_rows())
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row)
+            self._built_at = time.monotonic()
+
+    def ensure_built(self):
+        max_age = self._max_age
+        if max_age is None:
+            max_age = getattr(settings, 'SEARCH_INDEX_MAX_AGE', None)
+        with self._lock:
+            stale = self._built_at is None or (
+                max_age is not None and time.monotonic() - self._built_at > max_age
+            )
+        if stale:
+            self.build()
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def _add(self, product_id, created_at, price, category_id, brand_id, product_type, *attributes):
+        keys = {
+            'category': category_id,
+            'brand': brand_id,
+            'product_type': product_type,
+            'price': price_bucket(price),
+        }
+        for facet, value in zip(ATTRIBUTE_FACETS, attributes):
+            if value:
+                keys[facet] = True
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._rows)
+            self._rows.append(None)
+        bit = 1 << slot
+        for facet, key in keys.items():
+            self._bitsets[facet][key] |= bit
+        self._all |= bit
+
+        recency = created_at.timestamp() if created_at else 0.0
+        self._rows[slot] = (product_id, recency, price, keys)
+        self._slots[product_id] = slot
+
+    def _discard(self, product_id):
+        slot = self._slots.pop(product_id, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        for facet, key in self._rows[slot][3].items():
+            bitsets = self._bitsets[facet]
+            bitsets[key] &= mask
+            if not bitsets[key]:
+                del bitsets[key]
+        self._all &= mask
+        self._rows[slot] = None
+        self._free_slots.append(slot)
+
+    def refresh_products(self, product_ids):
+        if not self.is_built:
+            return
+        product_ids = set(product_ids)
+        rows = list(self._load_rows(id__in=product_ids))
+        with self._lock:
+            for product_id in product_ids:
+                self._discard(product_id)
+            for row in rows:
+                self._add(*row)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._discard(product_id)
+
+    # Querying
+
+    def _price_bits(self, price_min, price_max):
+        bits = 0
+        for index, low in enumerate(PRICE_BUCKETS):
+            high = PRICE_BUCKETS[index + 1] if index + 1 < len(PRICE_BUCKETS) else None
+            if price_max is not None and low > price_max:
+                break
+            if price_min is not None and high is not None and high <= price_min:
+                continue
+            bucket = self._bitsets['price'].get(index, 0)
+            covered = (price_min is None or low >= price_min) and (
+                price_max is None or (high is not None and high <= price_max)
+            )
+            if covered:
+                bits |= bucket
+                continue
+            # Bucket straddles a bound: test each member's exact price
+            for slot in bit_positions(bucket):
+                price = self._rows[slot][2]
+                if (price_min is None or price >= price_min) and (price_max is None or price <= price_max):
+                    bits |= 1 << slot
+        return bits
+
+    def query(self, category=None, brand=None, product_type=None,
+              price_min=None, price_max=None, sort='newest', **attributes):
+        """
+        Filter the catalog and count every facet value in one pass.
+
+        ``category`` and ``brand`` are ids, ``product_type`` a choice value,
+        prices inclusive bounds on ``Product.price`` and ``attributes``
+        ``is_organic``/``is_vegan``/``is_cruelty_free`` flags (only ``True``
+        filters). Counts for a facet ignore that facet's own selection, so
+        every option shows how many results picking it would give.
+
+        Returns a ``FacetResult`` of product ids, ordered like the keyset
+        ``sort`` option of the same name, and ``{facet: {key: count}}``.
+        """
+        self.ensure_built()
+        with self._lock:
+            selections = {}
+            for facet, key in (('category', category), ('brand', brand), ('product_type', product_type)):
+                if key is not None:
+                    selections[facet] = self._bitsets[facet].get(key, 0)
+            if price_min is not None or price_max is not None:
+                selections['price'] = self._price_bits(price_min, price_max)
+            for facet in ATTRIBUTE_FACETS:
+                if attributes.get(facet):
+                    selections[facet] = self._bitsets[facet].get(True, 0)
+
+            result = self._all
+            for bits in selections.values():
+                result &= bits
+
+            counts = {}
+            for facet in self.FACETS:
+                base = self._all
+                for other, bits in selections.items():
+                    if other != facet:
+                        base &= bits
+                counts[facet] = {
+                    key: (base & bits).bit_count()
+                    for key, bits in self._bitsets[facet].items()
+                }
+
+            rows = self._rows
+            sort_column = 2 if sort in ('price_low', 'price_high') else 1
+            slots = sorted(
+                bit_positions(result),
+                key=lambda slot: (rows[slot][sort_column], rows[slot][0]),
+                reverse=sort != 'price_low',
+            )
+            product_ids = [rows[slot][0] for slot in slots]
+
+        return FacetResult(product_ids, counts)
+
+
+facet_index = FacetIndex()
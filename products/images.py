@@ -0,0 +1,181 @@
+"""
+Resized JPEG and WebP derivatives of product images.
+
+Uploads are often multi-megabyte photos, so pages show fixed-size variants
+instead (``IMAGE_VARIANTS``), each encoded as JPEG and WebP and listed in
+``srcset`` so the browser downloads the smallest one that fits. Saving a
+ProductImage queues its variants once the transaction commits; resizing
+runs in a pool of worker processes so it never ties up a request thread,
+and ``manage.py generate_image_variants`` backfills existing media.
+
+Worker processes are started with ``spawn`` and only run
+``render_variants``, so this module must not import models at load time.
+"""
+import io
+import logging
+import multiprocessing
+import posixpath
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> longest edge in pixels, smallest first
+IMAGE_VARIANTS = {
+    'card': 400,
+    'gallery': 800,
+    'zoom': 1600,
+}
+
+# Format -> (Pillow format, file extension, encoder options)
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+}
+
+
+def render_variants(data):
+    """
+    Resize the image in ``data`` (bytes) to every variant and encode each as
+    JPEG and WebP. Returns ``{variant: (width, height, {format: bytes})}``.
+
+    Runs in a worker process, so it only touches Pillow.
+    """
+    with Image.open(io.BytesIO(data)) as upload:
+        source = ImageOps.exif_transpose(upload)
+        if source.mode not in ('RGB', 'L'):
+            # JPEG has no alpha channel: flatten transparent images onto white
+            source = source.convert('RGBA')
+            background = Image.new('RGB', source.size, 'white')
+            background.paste(source, mask=source.getchannel('A'))
+            source = background
+
+        rendered = {}
+        for variant, edge in IMAGE_VARIANTS.items():
+            image = source.copy()
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            encoded = {}
+            for fmt, (pil_format, _, options) in VARIANT_FORMATS.items():
+                buffer = io.BytesIO()
+                image.save(buffer, pil_format, **options)
+                encoded[fmt] = buffer.getvalue()
+            rendered[variant] = (image.width, image.height, encoded)
+    return rendered
+
+
+def variant_name(source_name, variant, fmt):
+    """Storage name of one variant: ``product_images/variants/<name>-<variant>.<ext>``."""
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f'{stem}-{variant}{VARIANT_FORMATS[fmt][1]}')
+
+
+def _storage():
+    from .models import ProductImage
+    return ProductImage._meta.get_field('image').storage
+
+
+def read_source(source_name):
+    with _storage().open(source_name, 'rb') as handle:
+        return handle.read()
+
+
+def store_variants(image_id, product_id, source_name, rendered):
+    """
+    Write rendered variants next to the upload and record their URLs on the
+    ProductImage, unless the image was replaced or deleted in the meantime.
+    """
+    from .models import ProductImage
+    from .page_cache import touch_product
+    from .search_cache import bump_catalog_version
+
+    storage = _storage()
+    variants = {}
+    by_size = {}
+    for variant, (width, height, encoded) in rendered.items():
+        if (width, height) in by_size:
+            # Small uploads are never upscaled: reuse the identical smaller variant
+            variants[variant] = by_size[width, height]
+            continue
+        entry = by_size[width, height] = {'width': width, 'height': height}
+        for fmt, data in encoded.items():
+            name = variant_name(source_name, variant, fmt)
+            # Regenerate in place rather than letting the storage pick a new name
+            storage.delete(name)
+            entry[fmt] = storage.url(storage.save(name, ContentFile(data)))
+        variants[variant] = entry
+
+    updated = ProductImage.objects.filter(pk=image_id, image=source_name).update(variants=variants)
+    if updated:
+        touch_product(product_id)
+        # Cached search results and the storefront snapshot embed image URLs
+        bump_catalog_version()
+    return bool(updated)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=None):
+    """The shared worker pool, started on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers or settings.IMAGE_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _store_result(job, future):
+    try:
+        store_variants(*job, future.result())
+    except Exception:
+        logger.exception('Could not generate variants for product image %s', job[0])
+    finally:
+        # Done callbacks run on the pool's result thread, which holds its own connection
+        connection.close()
+
+
+def enqueue_variants(image_id, product_id, source_name):
+    """
+    Render the variants of a ProductImage in the worker pool and store them
+    when they are ready. With ``IMAGE_VARIANT_WORKERS = 0`` they are rendered
+    inline instead.
+    """
+    job = (image_id, product_id, source_name)
+    try:
+        data = read_source(source_name)
+    except OSError:
+        logger.exception('Could not read product image %s', source_name)
+        return
+
+    if settings.IMAGE_VARIANT_WORKERS <= 0:
+        try:
+            store_variants(*job, render_variants(data))
+        except Exception:
+            logger.exception('Could not generate variants for product image %s', image_id)
+        return
+
+    try:
+        future = get_executor().submit(render_variants, data)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start a fresh pool
+        _reset_executor()
+        future = get_executor().submit(render_variants, data)
+    future.add_done_callback(lambda done: _store_result(job, done))
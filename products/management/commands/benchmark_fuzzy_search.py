@@ -0,0 +1,66 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.benchmarking import ADJECTIVES, BRANDS, CATEGORIES, NOUNS, misspell
+from products.search import InvertedIndex
+
+
+class Command(BaseCommand):
+	help = "Benchmark trigram fuzzy search against the linear name scan on a synthetic catalog"
+
+	def add_arguments(self, parser):
+		parser.add_argument("--size", type=int, default=100000, help="Number of synthetic products")
+		parser.add_argument("--queries", type=int, default=200, help="Number of misspelled queries")
+		parser.add_argument("--seed", type=int, default=42)
+
+	def handle(self, *args, **options):
+		rng = random.Random(options["seed"])
+		size = options["size"]
+		now = timezone.now()
+
+		rows = []
+		for product_id in range(1, size + 1):
+			name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}"
+			rows.append((
+				product_id, product_id % len(BRANDS), product_id % len(CATEGORIES), now,
+				name, BRANDS[product_id % len(BRANDS)], CATEGORIES[product_id % len(CATEGORIES)], "", "",
+			))
+		names = [(row[0], row[4]) for row in rows]
+		queries = [misspell(rng.choice(NOUNS), rng) for _ in range(options["queries"])]
+
+		self.stdout.write(self.style.MIGRATE_HEADING(f"Indexing {size} synthetic products..."))
+		started = time.perf_counter()
+		index = InvertedIndex()
+		index.load(rows)
+		build_seconds = time.perf_counter() - started
+
+		# Current behaviour: case-insensitive substring filter over every product
+		# name, collecting all matches as the storefront listing does
+		linear_results = []
+		started = time.perf_counter()
+		for query in queries:
+			linear_results.append([pid for pid, name in names if query in name.lower()])
+		linear_seconds = time.perf_counter() - started
+
+		fuzzy_results = []
+		started = time.perf_counter()
+		for query in queries:
+			fuzzy_results.append(index.fuzzy_search(query))
+		fuzzy_seconds = time.perf_counter() - started
+
+		count = len(queries)
+		self.stdout.write(f"Index build:   {build_seconds * 1000:.1f} ms")
+		for label, seconds, results in (
+			("Linear scan:  ", linear_seconds, linear_results),
+			("Trigram index:", fuzzy_seconds, fuzzy_results),
+		):
+			with_results = sum(1 for matches in results if matches)
+			self.stdout.write(
+				f"{label} {seconds / count * 1000:.2f} ms/query, "
+				f"{with_results}/{count} queries with results, "
+				f"{sum(map(len, results))} products matched in total"
+			)
+		self.stdout.write(self.style.SUCCESS("Benchmark complete."))
@@ -0,0 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from products.images import read_source, render_variants, store_variants
+from products.models import ProductImage
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized JPEG and WebP variants of product images. By default "
+        "only images without variants are processed (e.g. media uploaded before "
+        "variants existed, or whose background job failed); --all regenerates every image."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate variants for every image')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: IMAGE_VARIANT_WORKERS)')
+        parser.add_argument('--batch-size', type=int, default=50, help='Images read into memory at a time')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers is None:
+            # IMAGE_VARIANT_WORKERS = 0 renders inline in requests; the command still needs a pool
+            workers = settings.IMAGE_VARIANT_WORKERS or 1
+        if workers < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers and --batch-size must be positive")
+
+        images = ProductImage.objects.exclude(image='').order_by('id')
+        if not options['all']:
+            images = images.filter(variants={})
+        jobs = list(images.values_list('id', 'product_id', 'image'))
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Generating variants for {len(jobs)} product images with {workers} workers..."
+        ))
+
+        generated = failed = 0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for start in range(0, len(jobs), options['batch_size']):
+                batch = []
+                for job in jobs[start:start + options['batch_size']]:
+                    try:
+                        batch.append((job, pool.submit(render_variants, read_source(job[2]))))
+                    except OSError as error:
+                        failed += 1
+                        self.stderr.write(f"  {job[2]}: {error}")
+                for job, future in batch:
+                    try:
+                        if store_variants(*job, future.result()):
+                            generated += 1
+                    except Exception as error:
+                        failed += 1
+                        self.stderr.write(f"  {job[2]}: {error}")
+                self.stdout.write(f"  {min(start + options['batch_size'], len(jobs))} images processed")
+
+        self.stdout.write(self.style.SUCCESS(f"Variants generated for {generated} product images ({failed} failed)."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from products.search_backends import get_search_backend
+from products.search_cache import bump_catalog_version
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index of the configured search backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Products indexed per batch')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Rebuilding search index with {type(backend).__name__}..."))
+
+        def progress(indexed):
+            self.stdout.write(f"  {indexed} products indexed")
+
+        backend.rebuild(batch_size=options['batch_size'], progress=progress)
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
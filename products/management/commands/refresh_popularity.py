@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from products.models import ProductPopularity
+from products.popularity import changed_product_ids, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh precomputed product popularity. By default only products with "
+        "order or review activity since the last run are recomputed; run with "
+        "--full periodically (e.g. nightly) to apply time decay to every product."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every product')
+        parser.add_argument('--since', help='Recompute products changed after this ISO timestamp')
+        parser.add_argument('--batch-size', type=int, default=500, help='Products written per transaction')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        product_ids = None
+        if not options['full']:
+            since = self._since(options['since'])
+            if since is not None:
+                product_ids = changed_product_ids(since, now=now)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"Refreshing popularity for {len(product_ids)} products changed since {since:%Y-%m-%d %H:%M:%S}..."
+                ))
+        if product_ids is None:
+            self.stdout.write(self.style.MIGRATE_HEADING("Refreshing popularity for all products..."))
+
+        def progress(written):
+            self.stdout.write(f"  {written} products scored")
+
+        written = refresh_popularity(product_ids, batch_size=options['batch_size'], now=now, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Popularity refreshed for {written} products."))
+
+    def _since(self, value):
+        if value is None:
+            return ProductPopularity.objects.aggregate(last=Max('computed_at'))['last']
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f"Invalid --since timestamp: {value}")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
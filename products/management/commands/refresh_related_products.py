@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from products.models import RelatedProduct
+from products.related import changed_product_ids, refresh_related
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the precomputed related products. By default only products edited, "
+        "ordered or listed next to an edited product since the last run are recomputed; "
+        "run with --full periodically (e.g. nightly) so every list reflects new products "
+        "and purchases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every product')
+        parser.add_argument('--since', help='Recompute products changed after this ISO timestamp')
+        parser.add_argument('--batch-size', type=int, default=500, help='Products written per transaction')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        product_ids = None
+        if not options['full']:
+            since = self._since(options['since'])
+            if since is not None:
+                product_ids = changed_product_ids(since)
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"Refreshing related products for {len(product_ids)} products changed since {since:%Y-%m-%d %H:%M:%S}..."
+                ))
+        if product_ids is None:
+            self.stdout.write(self.style.MIGRATE_HEADING("Refreshing related products for all products..."))
+
+        def progress(processed):
+            self.stdout.write(f"  {processed} products processed")
+
+        processed = refresh_related(product_ids, batch_size=options['batch_size'], now=now, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Related products refreshed for {processed} products."))
+
+    def _since(self, value):
+        if value is None:
+            return RelatedProduct.objects.aggregate(last=Max('computed_at'))['last']
+        since = parse_datetime(value)
+        if since is None:
+            raise CommandError(f"Invalid --since timestamp: {value}")
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
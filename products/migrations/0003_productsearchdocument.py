@@ -0,0 +1,107 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SQLITE_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE products_product_fts USING fts5(
+        name, brand, category, body,
+        content='products_productsearchdocument',
+        content_rowid='product_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER products_search_document_ai AFTER INSERT ON products_productsearchdocument BEGIN
+        INSERT INTO products_product_fts(rowid, name, brand, category, body)
+        VALUES (new.product_id, new.name, new.brand, new.category, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER products_search_document_ad AFTER DELETE ON products_productsearchdocument BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, brand, category, body)
+        VALUES ('delete', old.product_id, old.name, old.brand, old.category, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER products_search_document_au AFTER UPDATE ON products_productsearchdocument BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, brand, category, body)
+        VALUES ('delete', old.product_id, old.name, old.brand, old.category, old.body);
+        INSERT INTO products_product_fts(rowid, name, brand, category, body)
+        VALUES (new.product_id, new.name, new.brand, new.category, new.body);
+    END
+    """,
+]
+
+SQLITE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS products_search_document_au",
+    "DROP TRIGGER IF EXISTS products_search_document_ad",
+    "DROP TRIGGER IF EXISTS products_search_document_ai",
+    "DROP TABLE IF EXISTS products_product_fts",
+]
+
+MYSQL_FULLTEXT_SQL = [
+    "CREATE FULLTEXT INDEX products_search_document_ft "
+    "ON products_productsearchdocument (name, brand, category, body)",
+]
+
+MYSQL_FULLTEXT_DROP_SQL = [
+    "DROP INDEX products_search_document_ft ON products_productsearchdocument",
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def create_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        statements = SQLITE_FTS_SQL
+    elif connection.vendor == 'mysql':
+        statements = MYSQL_FULLTEXT_SQL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements = SQLITE_FTS_DROP_SQL
+    elif connection.vendor == 'mysql':
+        statements = MYSQL_FULLTEXT_DROP_SQL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='products.product')),
+                ('name', models.CharField(max_length=200)),
+                ('brand', models.CharField(max_length=100)),
+                ('category', models.CharField(max_length=100)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Product Search Document',
+                'verbose_name_plural': 'Product Search Documents',
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
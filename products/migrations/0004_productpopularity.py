@@ -0,0 +1,87 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# SQLite rebuilds products_productsearchdocument to add the popularity column,
+# which drops the FTS5 sync triggers from 0003; recreate them afterwards. The
+# update trigger now only fires for the indexed text columns, so refreshing
+# popularity does not re-tokenize every document.
+SQLITE_TRIGGER_SQL = [
+    """
+    CREATE TRIGGER products_search_document_ai AFTER INSERT ON products_productsearchdocument BEGIN
+        INSERT INTO products_product_fts(rowid, name, brand, category, body)
+        VALUES (new.product_id, new.name, new.brand, new.category, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER products_search_document_ad AFTER DELETE ON products_productsearchdocument BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, brand, category, body)
+        VALUES ('delete', old.product_id, old.name, old.brand, old.category, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER products_search_document_au
+    AFTER UPDATE OF name, brand, category, body ON products_productsearchdocument BEGIN
+        INSERT INTO products_product_fts(products_product_fts, rowid, name, brand, category, body)
+        VALUES ('delete', old.product_id, old.name, old.brand, old.category, old.body);
+        INSERT INTO products_product_fts(rowid, name, brand, category, body)
+        VALUES (new.product_id, new.name, new.brand, new.category, new.body);
+    END
+    """,
+]
+
+SQLITE_DROP_TRIGGER_SQL = [
+    "DROP TRIGGER IF EXISTS products_search_document_au",
+    "DROP TRIGGER IF EXISTS products_search_document_ad",
+    "DROP TRIGGER IF EXISTS products_search_document_ai",
+]
+
+
+def _has_fts_table(schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return False
+    return 'products_product_fts' in connection.introspection.table_names()
+
+
+def recreate_fts_triggers(apps, schema_editor):
+    if not _has_fts_table(schema_editor):
+        return
+    for statement in SQLITE_DROP_TRIGGER_SQL + SQLITE_TRIGGER_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_productsearchdocument'),
+    ]
+
+    operations = [
+        # On reverse, runs after the column is dropped (and the table rebuilt again)
+        migrations.RunPython(migrations.RunPython.noop, recreate_fts_triggers),
+        migrations.CreateModel(
+            name='ProductPopularity',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='products.product')),
+                ('score', models.FloatField(db_index=True, default=0.0)),
+                ('recent_units', models.FloatField(default=0.0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0.0)),
+                ('computed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Product Popularity',
+                'verbose_name_plural': 'Product Popularity',
+            },
+        ),
+        migrations.AddField(
+            model_name='productsearchdocument',
+            name='popularity',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(recreate_fts_triggers, migrations.RunPython.noop),
+    ]
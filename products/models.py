@@ -1,8 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.validators import RegexValidator
+from django.core.exceptions import ValidationError
 from decimal import Decimal
-from django.db.models import Avg
+from django.db.models import F, Prefetch, Value, Window
+from django.db.models.functions import Concat, RowNumber, Substr
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .images import IMAGE_VARIANTS, enqueue_variants
 
 
 class Category(models.Model):
@@ -12,6 +18,10 @@ class Category(models.Model):
     image = models.ImageField(upload_to='category_images/', blank=True, null=True)
     is_active = models.BooleanField(default=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, blank=True, null=True, related_name='children')
+    # Materialized path: the ids from the root down to this category, e.g. "3/17/42/".
+    # A subtree is every category whose path starts with this one's.
+    path = models.CharField(max_length=255, editable=False, db_index=True, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -25,6 +35,69 @@ class Category(models.Model):
     
     def get_absolute_url(self):
         return f'/products/category/{self.slug}/'
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored parent so save() only rewrites paths on a move
+        if 'parent_id' in field_names:
+            instance._stored_parent_id = instance.parent_id
+        return instance
+    
+    @property
+    def ancestor_ids(self):
+        """Ids from the root down to the parent, read from the path."""
+        return [int(part) for part in self.path.split('/')[:-2]]
+    
+    def get_ancestors(self, include_self=False):
+        """Ancestors from the root down, in one query."""
+        ids = self.ancestor_ids + ([self.pk] if include_self else [])
+        return Category.objects.filter(id__in=ids).order_by('depth')
+    
+    def get_descendants(self, include_self=True):
+        """Every category in this subtree, in one indexed query."""
+        descendants = Category.objects.filter(path__startswith=self.path)
+        return descendants if include_self else descendants.exclude(pk=self.pk)
+    
+    def _parent_path(self):
+        if self.parent_id is None:
+            return '', -1
+        return Category.objects.values_list('path', 'depth').get(pk=self.parent_id)
+    
+    def clean(self):
+        super().clean()
+        if self.pk and self.parent_id and self.path:
+            parent_path, _ = self._parent_path()
+            if parent_path.startswith(self.path):
+                raise ValidationError({'parent': 'A category cannot be moved under itself or one of its subcategories.'})
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        moved = (
+            self._state.adding or not self.path
+            or self.parent_id != getattr(self, '_stored_parent_id', self.parent_id)
+        ) and (update_fields is None or 'parent' in update_fields)
+        if not moved:
+            return super().save(*args, **kwargs)
+        
+        with transaction.atomic():
+            parent_path, parent_depth = self._parent_path()
+            if self.path and parent_path.startswith(self.path):
+                raise ValueError('A category cannot be moved under itself or one of its subcategories.')
+            super().save(*args, **kwargs)
+            old_path = self.path
+            self.path = f'{parent_path}{self.pk}/'
+            depth_change = parent_depth + 1 - self.depth
+            self.depth = parent_depth + 1
+            if old_path:
+                # Rewrite the prefix of the whole subtree (this category included) in one UPDATE
+                Category.objects.filter(path__startswith=old_path).update(
+                    path=Concat(Value(self.path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + depth_change,
+                )
+            else:
+                Category.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        self._stored_parent_id = self.parent_id
 
 
 class Brand(models.Model):
@@ -46,6 +119,35 @@ class Brand(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def for_cards(self):
+        """
+        Everything a product card renders, in a fixed number of queries for
+        the whole page: brand, category, inventory and rating summary are
+        joined in, and only the primary image of each product is prefetched.
+        """
+        primary_images = ProductImage.objects.annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F('product_id'),
+                order_by=[F('is_primary').desc(), F('order').asc(), F('created_at').asc()],
+            ),
+        ).filter(position=1)
+        return self.select_related(
+            'brand', 'category', 'inventory', 'rating_summary',
+        ).prefetch_related(
+            Prefetch('images', queryset=primary_images, to_attr='primary_images'),
+        )
+    
+    def related_to(self, product):
+        """Precomputed neighbours of ``product`` (see RelatedProduct), best first."""
+        return self.filter(neighbor_of__product=product).order_by('neighbor_of__rank')
+    
+    def in_category_tree(self, category):
+        """Products in ``category`` or any of its subcategories (one indexed join)."""
+        return self.filter(category__path__startswith=category.path)
+
+
 class Product(models.Model):
     PRODUCT_TYPE_CHOICES = [
         ('skincare', 'Skincare'),
@@ -96,10 +198,19 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination seeks on (created_at, id) and (price, id)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['category', 'created_at', 'id']),
+            models.Index(fields=['brand', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.brand.name} - {self.name}"
@@ -117,16 +228,149 @@ class Product(models.Model):
             return int(((self.price - self.sale_price) / self.price) * 100)
         return 0
     
+    @cached_property
+    def main_product_image(self):
+        """The primary ProductImage (or the first by display order), or None."""
+        if hasattr(self, 'primary_images'):
+            return self.primary_images[0] if self.primary_images else None
+        return self.images.order_by('-is_primary', 'order', 'created_at').first()
+    
+    @property
+    def main_image(self):
+        """File of the primary image, or None."""
+        image = self.main_product_image
+        return image.image if image else None
+    
+    def get_rating_summary(self):
+        """The product's ProductRatingSummary, or an empty unsaved one if it has no reviews yet."""
+        from review_system.models import ProductRatingSummary
+        try:
+            return self.rating_summary
+        except ProductRatingSummary.DoesNotExist:
+            return ProductRatingSummary(product=self)
+    
     @property
     def average_rating(self):
-        from review_system.models import Review
-        avg = Review.objects.filter(product=self, is_active=True).aggregate(Avg('rating'))
-        return avg['rating__avg'] or 0
+        return self.get_rating_summary().average_rating
     
     @property
     def review_count(self):
-        from review_system.models import Review
-        return Review.objects.filter(product=self, is_active=True).count()
+        return self.get_rating_summary().review_count
+
+
+class ProductSearchDocument(models.Model):
+    """Denormalized search text for one active product, indexed by the database search backends."""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    name = models.CharField(max_length=200)
+    brand = models.CharField(max_length=100)
+    category = models.CharField(max_length=100)
+    body = models.TextField(blank=True)
+    # Copy of ProductPopularity.score so full-text queries can rank without a join
+    popularity = models.FloatField(default=0.0)
+    
+    class Meta:
+        verbose_name = 'Product Search Document'
+        verbose_name_plural = 'Product Search Documents'
+    
+    def __str__(self):
+        return f"Search document for {self.name}"
+
+
+class ProductPopularity(models.Model):
+    """
+    Precomputed popularity of a product, used as a search ranking feature.
+    
+    Refreshed by the ``refresh_popularity`` management command from recent
+    order volume (time-decayed), review count and average rating.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    score = models.FloatField(default=0.0, db_index=True)
+    recent_units = models.FloatField(default=0.0)
+    review_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0.0)
+    # Start of the refresh run that wrote this row; the next incremental run resumes from here
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Product Popularity'
+        verbose_name_plural = 'Product Popularity'
+    
+    def __str__(self):
+        return f"Popularity of product {self.product_id}: {self.score:.3f}"
+
+
+class RelatedProduct(models.Model):
+    """
+    One precomputed neighbour of a product, ranked best first.
+    
+    Written by the ``refresh_related_products`` management command, which
+    blends category, brand, co-purchases and text similarity (see
+    ``products.related``), so product pages read their related products with
+    one indexed query.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='neighbor_of')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    # Start of the refresh run that wrote this row; the next incremental run resumes from here
+    computed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Related Product'
+        verbose_name_plural = 'Related Products'
+        constraints = [
+            # Also the index behind "neighbours of X ordered by rank"
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_related_product_rank'),
+            models.UniqueConstraint(fields=['product', 'related'], name='unique_related_product_pair'),
+        ]
+    
+    def __str__(self):
+        return f"Product {self.related_id} related to {self.product_id} (#{self.rank})"
+
+
+class CacheVersion(models.Model):
+    """
+    A named counter that cached data is keyed on.
+    
+    Kept in the database rather than the cache so a bump made by one web
+    worker or management command is seen by every process: each one reads
+    the current number and ignores entries cached under an older one.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    
+    class Meta:
+        verbose_name = 'Cache Version'
+        verbose_name_plural = 'Cache Versions'
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+    
+    @classmethod
+    def current(cls, name):
+        """Current version of ``name``; 1 until it is first bumped."""
+        version = cls.objects.filter(name=name).values_list('version', flat=True).first()
+        return 1 if version is None else version
+    
+    @classmethod
+    def current_many(cls, names):
+        """Current versions of ``names`` as a dict, in one query."""
+        stored = dict(cls.objects.filter(name__in=names).values_list('name', 'version'))
+        return {name: stored.get(name, 1) for name in names}
+    
+    @classmethod
+    def bump(cls, names):
+        """Move every name in ``names`` to a new version with one UPDATE (plus inserts for new names)."""
+        names = set(names)
+        if not names:
+            return
+        with transaction.atomic():
+            existing = set(cls.objects.filter(name__in=names).values_list('name', flat=True))
+            cls.objects.filter(name__in=existing).update(version=F('version') + 1)
+            # An unknown name reads as 1, so its first bump starts at 2
+            cls.objects.bulk_create(
+                [cls(name=name, version=2) for name in names - existing], ignore_conflicts=True,
+            )
 
 
 class ProductImage(models.Model):
@@ -135,6 +379,8 @@ class ProductImage(models.Model):
     alt_text = models.CharField(max_length=200, blank=True)
     is_primary = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
+    # Variant name -> {width, height, jpeg, webp} URLs, filled in by products.images
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -145,11 +391,51 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"Image for {self.product.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored file so save() only regenerates variants when it changes
+        if 'image' in field_names:
+            instance._stored_image = instance.image.name
+        return instance
+    
     def save(self, *args, **kwargs):
         if self.is_primary:
             # Set all other images to non-primary
             ProductImage.objects.filter(product=self.product, is_primary=True).update(is_primary=False)
+        image_changed = self.image.name != getattr(self, '_stored_image', None)
+        if image_changed:
+            self.variants = {}
         super().save(*args, **kwargs)
+        if image_changed and self.image:
+            self._stored_image = self.image.name
+            job = (self.pk, self.product_id, self.image.name)
+            transaction.on_commit(lambda: enqueue_variants(*job))
+    
+    @property
+    def src(self):
+        """URL for a plain ``<img src>``: the card variant once generated, else the upload."""
+        card = self.variants.get('card')
+        return card['jpeg'] if card else self.image.url
+    
+    def _srcset(self, fmt):
+        candidates = []
+        widths = set()
+        for variant in IMAGE_VARIANTS:
+            entry = self.variants.get(variant)
+            # Small uploads are never upscaled, so several variants can share a width
+            if entry and entry['width'] not in widths:
+                widths.add(entry['width'])
+                candidates.append(f"{entry[fmt]} {entry['width']}w")
+        return ', '.join(candidates)
+    
+    @property
+    def jpeg_srcset(self):
+        return self._srcset('jpeg')
+    
+    @property
+    def webp_srcset(self):
+        return self._srcset('webp')
 
 
 class ProductVariant(models.Model):
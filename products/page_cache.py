@@ -0,0 +1,44 @@
+"""
+Versions for the cached fragments of the product detail page.
+
+Fragments are keyed on ``Product.updated_at`` plus a per-product review
+version kept in ``CacheVersion``, so every worker sees the same versions.
+Editing a product or its images moves ``updated_at`` and saving or deleting
+a review bumps the review version, so the next render caches fresh
+fragments; superseded entries age out. A change to a product's rating also
+bumps the review version of every product that lists it as related, since
+their related cards show that rating.
+"""
+from django.utils import timezone
+
+
+def _review_version_name(product_id):
+    return f'product:{product_id}:reviews'
+
+
+def review_version(product_id):
+    """Current review version of a product; 1 until its first review change."""
+    from .models import CacheVersion
+    return CacheVersion.current(_review_version_name(product_id))
+
+
+def bump_review_version(product_id):
+    """Invalidate the product's cached review fragments."""
+    from .models import CacheVersion
+    CacheVersion.bump([_review_version_name(product_id)])
+
+
+def bump_neighbour_review_versions(product_id):
+    """Invalidate the related-products fragments of pages listing ``product_id``."""
+    from .models import CacheVersion, RelatedProduct
+    neighbour_ids = RelatedProduct.objects.filter(related_id=product_id).values_list('product_id', flat=True)
+    CacheVersion.bump(_review_version_name(neighbour_id) for neighbour_id in neighbour_ids)
+
+
+def touch_product(product_id):
+    """
+    Move ``updated_at`` forward for changes stored outside the product row
+    (images). A queryset update, so the catalog signals don't fire again.
+    """
+    from .models import Product
+    Product.objects.filter(pk=product_id).update(updated_at=timezone.now())
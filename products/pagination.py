@@ -0,0 +1,210 @@
+"""
+Keyset (seek) pagination for storefront product listings.
+
+Pages are addressed by an opaque cursor holding the sort key of the last (or
+first) row shown instead of an OFFSET, so the database seeks straight to the
+page through an index and page 500 costs the same as page 1. Listings built
+from in-memory id lists (search and facet results) use the last product id
+seen as their cursor.
+"""
+import base64
+import json
+import math
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 60
+
+# Sort option -> ordering; the trailing id makes every key unique
+ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+}
+
+SORT_CHOICES = [
+    ('newest', 'Newest'),
+    ('price_low', 'Price: Low to High'),
+    ('price_high', 'Price: High to Low'),
+]
+
+
+class KeysetPage:
+    """One page of results plus the cursors of its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def get_page_size(params, default_size=DEFAULT_PAGE_SIZE, max_size=MAX_PAGE_SIZE):
+    try:
+        size = int(params.get('per_page', default_size))
+    except (TypeError, ValueError):
+        return default_size
+    return max(1, min(size, max_size))
+
+
+def get_sort(params, orderings=ORDERINGS):
+    sort = params.get('sort')
+    return sort if sort in orderings else 'newest'
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _is_cursor_value(value):
+    # Cursors only ever hold strings and finite numbers; anything else was edited
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, int):
+        # Wider than any integer column
+        return -2 ** 63 <= value < 2 ** 63
+    return isinstance(value, str)
+
+
+def decode_cursor(token):
+    """The list of values in ``token``, or None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or not all(_is_cursor_value(value) for value in values):
+        return None
+    return values
+
+
+def _seek_filter(fields, values, forward):
+    """Q selecting rows strictly after (or before) ``values`` in ``fields`` order."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(fields, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def paginate_queryset(queryset, params, sort='newest', orderings=ORDERINGS,
+                      default_size=DEFAULT_PAGE_SIZE, max_size=MAX_PAGE_SIZE):
+    """
+    Return a ``KeysetPage`` of ``queryset`` ordered by ``orderings[sort]``.
+
+    ``params`` is ``request.GET``; ``after``/``before`` carry the cursor and
+    ``per_page`` the page size, capped at ``max_size``. Other listings can
+    pass their own ``orderings``; each must end in a unique field.
+    """
+    fields = orderings[sort]
+    names = [field.lstrip('-') for field in fields]
+    model_fields = [queryset.model._meta.get_field(name) for name in names]
+    size = get_page_size(params, default_size, max_size)
+
+    forward = True
+    cursor = decode_cursor(params.get('after'))
+    if cursor is None:
+        cursor = decode_cursor(params.get('before'))
+        forward = cursor is None
+
+    values = None
+    if cursor is not None and len(cursor) == len(fields):
+        try:
+            values = [field.to_python(value) for field, value in zip(model_fields, cursor)]
+        except (ValidationError, TypeError, ValueError, OverflowError):
+            values = None
+    if values is None or None in values:
+        cursor, forward = None, True
+    else:
+        queryset = queryset.filter(_seek_filter(fields, values, forward))
+
+    if forward:
+        ordering = fields
+    else:
+        ordering = [name if field.startswith('-') else f'-{name}' for field, name in zip(fields, names)]
+    rows = list(queryset.order_by(*ordering)[:size + 1])
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if not forward:
+        rows.reverse()
+
+    def key(obj):
+        values = [getattr(obj, name) for name in names]
+        return encode_cursor([
+            value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in values
+        ])
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if forward:
+            next_cursor = key(rows[-1]) if has_more else None
+            previous_cursor = key(rows[0]) if cursor is not None else None
+        else:
+            next_cursor = key(rows[-1])
+            previous_cursor = key(rows[0]) if has_more else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate_ids(product_ids, params, default_size=DEFAULT_PAGE_SIZE, max_size=MAX_PAGE_SIZE):
+    """
+    Return a ``KeysetPage`` over an already ordered list of product ids.
+
+    The cursor is the id of the last (``after``) or first (``before``)
+    product of the neighbouring page.
+    """
+    size = get_page_size(params, default_size, max_size)
+    positions = None
+
+    def position_of(token):
+        nonlocal positions
+        try:
+            product_id = int(token)
+        except (TypeError, ValueError):
+            return None
+        if positions is None:
+            positions = {pid: index for index, pid in enumerate(product_ids)}
+        return positions.get(product_id)
+
+    after = position_of(params.get('after'))
+    before = position_of(params.get('before'))
+    if after is not None:
+        start, end = after + 1, after + 1 + size
+    elif before is not None:
+        start, end = max(0, before - size), before
+    else:
+        start, end = 0, size
+    end = min(end, len(product_ids))
+
+    page_ids = product_ids[start:end]
+    next_cursor = str(page_ids[-1]) if page_ids and end < len(product_ids) else None
+    previous_cursor = str(page_ids[0]) if page_ids and start > 0 else None
+    return KeysetPage(page_ids, next_cursor, previous_cursor)
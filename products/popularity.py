@@ -0,0 +1,170 @@
+"""
+Precomputed product popularity.
+
+A product's score blends three signals:
+
+* recent sales: units from non-cancelled orders in the last
+  ``POPULARITY_WINDOW_DAYS``, each weighted by ``0.5 ** (age / half-life)``
+  with ``POPULARITY_HALF_LIFE_DAYS`` as the half-life;
+* review count;
+* average rating, shrunk towards a neutral prior so one 5-star review does
+  not beat fifty 4-star ones.
+
+Scores are written to ``ProductPopularity`` (and copied onto
+``ProductSearchDocument``) by ``refresh_popularity``, so search ranking reads
+a stored number instead of aggregating orders and reviews per query.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .search_cache import bump_catalog_version
+
+
+# Order statuses whose items do not count as sales
+EXCLUDED_ORDER_STATUSES = ('cancelled', 'refunded')
+
+# Bayesian prior for the rating component: RATING_PRIOR_WEIGHT reviews of RATING_PRIOR_MEAN stars
+RATING_PRIOR_MEAN = 3.0
+RATING_PRIOR_WEIGHT = 5
+
+REVIEW_WEIGHT = 0.5
+RATING_WEIGHT = 1.0
+
+
+def half_life_days():
+    return getattr(settings, 'POPULARITY_HALF_LIFE_DAYS', 30)
+
+
+def window_days():
+    return getattr(settings, 'POPULARITY_WINDOW_DAYS', 180)
+
+
+def popularity_score(recent_units, review_count, average_rating):
+    """Combine the decayed sales volume and review signals into one score."""
+    shrunk_rating = (
+        (RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT + average_rating * review_count)
+        / (RATING_PRIOR_WEIGHT + review_count)
+    )
+    return (
+        math.log1p(recent_units)
+        + REVIEW_WEIGHT * math.log1p(review_count)
+        + RATING_WEIGHT * (shrunk_rating - 1) / 4
+    )
+
+
+def compute_popularity(product_ids, now=None):
+    """
+    Return ``{product_id: (score, recent_units, review_count, average_rating)}``
+    for the given products, reading their orders and rating summaries in three queries.
+    """
+    from order_management.models import OrderItem
+    from review_system.models import ProductRatingSummary
+    from .models import Product
+
+    now = now or timezone.now()
+    half_life = timedelta(days=half_life_days()).total_seconds()
+    skus = dict(Product.objects.filter(id__in=product_ids).values_list('sku', 'id'))
+
+    recent_units = dict.fromkeys(skus.values(), 0.0)
+    items = (
+        OrderItem.objects.filter(
+            product_sku__in=list(skus),
+            order__created_at__gte=now - timedelta(days=window_days()),
+        )
+        .exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+        .values_list('product_sku', 'quantity', 'order__created_at')
+    )
+    for sku, quantity, ordered_at in items:
+        age = max((now - ordered_at).total_seconds(), 0.0)
+        recent_units[skus[sku]] += quantity * 0.5 ** (age / half_life)
+
+    reviews = {
+        product_id: (count, average)
+        for product_id, count, average in ProductRatingSummary.objects.filter(
+            product_id__in=list(recent_units),
+        ).values_list('product_id', 'review_count', 'average_rating')
+    }
+
+    popularity = {}
+    for product_id, units in recent_units.items():
+        review_count, average_rating = reviews.get(product_id, (0, 0.0))
+        popularity[product_id] = (
+            popularity_score(units, review_count, average_rating),
+            units, review_count, float(average_rating),
+        )
+    return popularity
+
+
+def changed_product_ids(since, now=None):
+    """
+    Ids of products whose popularity inputs may have changed after ``since``:
+    new or updated orders, changed rating summaries, new products, and products with order
+    items that have aged out of the window since then.
+    """
+    from order_management.models import OrderItem
+    from review_system.models import ProductRatingSummary
+    from .models import Product
+
+    now = now or timezone.now()
+    window = timedelta(days=window_days())
+    skus = OrderItem.objects.filter(
+        Q(order__updated_at__gte=since)
+        | Q(order__created_at__gte=since - window, order__created_at__lt=now - window)
+    ).values('product_sku')
+
+    product_ids = set(Product.objects.filter(
+        Q(sku__in=skus) | Q(created_at__gte=since) | Q(popularity__isnull=True)
+    ).values_list('id', flat=True))
+    product_ids.update(
+        ProductRatingSummary.objects.filter(updated_at__gte=since).values_list('product_id', flat=True)
+    )
+    return product_ids
+
+
+def refresh_popularity(product_ids=None, batch_size=500, now=None, progress=None):
+    """
+    Recompute and store popularity for ``product_ids`` (every product when
+    ``None``), ``batch_size`` products per transaction. Returns the number of
+    products written, and moves the catalog version if any were.
+    """
+    from .models import Product, ProductPopularity, ProductSearchDocument
+
+    if product_ids is None:
+        product_ids = Product.objects.values_list('id', flat=True)
+    product_ids = sorted(product_ids)
+    now = now or timezone.now()
+
+    written = 0
+    for start in range(0, len(product_ids), batch_size):
+        popularity = compute_popularity(product_ids[start:start + batch_size], now=now)
+        rows = [
+            ProductPopularity(
+                product_id=product_id, score=score, recent_units=units,
+                review_count=review_count, average_rating=average_rating, computed_at=now,
+            )
+            for product_id, (score, units, review_count, average_rating) in popularity.items()
+        ]
+        with transaction.atomic():
+            ProductPopularity.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=['score', 'recent_units', 'review_count', 'average_rating', 'computed_at'],
+            )
+            ProductSearchDocument.objects.filter(product_id__in=list(popularity)).update(
+                popularity=Subquery(
+                    ProductPopularity.objects.filter(product_id=OuterRef('product_id')).values('score')[:1]
+                )
+            )
+        written += len(rows)
+        if progress:
+            progress(written)
+    if written:
+        # Search results are ordered by popularity
+        bump_catalog_version()
+    return written
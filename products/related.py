@@ -0,0 +1,220 @@
+"""
+Precomputed related products.
+
+A candidate's score for a product blends four signals:
+
+* same category and same brand (fixed bonuses);
+* co-purchases: how often both appear in the same non-cancelled order,
+  as a cosine over the two products' order counts;
+* text similarity: TF-IDF cosine over name, short description and
+  description;
+* a small popularity bonus that breaks ties between otherwise equal
+  candidates.
+
+Scoring every pair is quadratic, so candidates are only the most
+text-similar products (found through an inverted index of the less common
+terms), co-purchased products, and the most popular products of the same
+category or brand. The top ``RELATED_LIMIT`` are written to
+``RelatedProduct`` by ``refresh_related_products``.
+"""
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .popularity import EXCLUDED_ORDER_STATUSES
+from .search import stem, tokenize
+from .search_cache import bump_catalog_version
+
+
+RELATED_LIMIT = 8
+
+CATEGORY_WEIGHT = 1.0
+BRAND_WEIGHT = 0.5
+COPURCHASE_WEIGHT = 2.0
+TEXT_WEIGHT = 1.5
+POPULARITY_WEIGHT = 0.1
+
+# Most popular products of the same category/brand considered as candidates
+GROUP_CANDIDATES = 50
+# Most text-similar products considered as candidates
+TEXT_CANDIDATES = 100
+# Terms in more than this share (or number) of products are too common to find neighbours
+MAX_TERM_SHARE = 0.2
+MAX_TERM_PRODUCTS = 500
+# Larger orders (bulk buys) say little about which products go together
+MAX_BASKET_SIZE = 20
+
+
+class RelatedProductScorer:
+    """Every active product's features, loaded once and scored in memory."""
+
+    def __init__(self):
+        from order_management.models import OrderItem
+        from .models import Product
+
+        rows = Product.objects.filter(is_active=True).values_list(
+            'id', 'sku', 'category_id', 'brand_id', 'name', 'short_description', 'description',
+            'popularity__score',
+        )
+        self.category = {}
+        self.brand = {}
+        self.popularity = {}
+        self.vectors = {}
+        skus = {}
+        terms = {}
+        for product_id, sku, category_id, brand_id, name, short_description, description, popularity in rows:
+            skus[sku] = product_id
+            self.category[product_id] = category_id
+            self.brand[product_id] = brand_id
+            self.popularity[product_id] = popularity or 0.0
+            # The name counts twice: it is the most specific text a product has
+            text = f'{name} {name} {short_description} {description}'
+            terms[product_id] = Counter(stem(token) for token in tokenize(text))
+
+        # TF-IDF vectors, normalized so a dot product is the cosine
+        document_frequency = Counter(term for counts in terms.values() for term in counts)
+        total = max(len(terms), 1)
+        max_postings = max(2, min(int(total * MAX_TERM_SHARE), MAX_TERM_PRODUCTS))
+        self.postings = defaultdict(list)
+        for product_id, counts in terms.items():
+            vector = {
+                term: (1 + math.log(count)) * math.log(1 + total / document_frequency[term])
+                for term, count in counts.items()
+            }
+            norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+            self.vectors[product_id] = {term: weight / norm for term, weight in vector.items()}
+            for term in vector:
+                if document_frequency[term] <= max_postings:
+                    self.postings[term].append(product_id)
+
+        top_popularity = max(self.popularity.values(), default=0.0)
+        self.popularity_bonus = {
+            product_id: (score / top_popularity if top_popularity > 0 else 0.0)
+            for product_id, score in self.popularity.items()
+        }
+
+        def most_popular(groups):
+            members = defaultdict(list)
+            for product_id, group in groups.items():
+                members[group].append(product_id)
+            return {
+                group: sorted(ids, key=lambda pid: (-self.popularity[pid], pid))[:GROUP_CANDIDATES]
+                for group, ids in members.items()
+            }
+
+        self.category_top = most_popular(self.category)
+        self.brand_top = most_popular(self.brand)
+
+        baskets = defaultdict(set)
+        items = (
+            OrderItem.objects.exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+            .values_list('order_id', 'product_sku')
+        )
+        for order_id, sku in items:
+            product_id = skus.get(sku)
+            if product_id is not None:
+                baskets[order_id].add(product_id)
+        self.order_counts = Counter()
+        self.co_purchases = defaultdict(Counter)
+        for basket in baskets.values():
+            self.order_counts.update(basket)
+            if len(basket) > MAX_BASKET_SIZE:
+                continue
+            for product_id in basket:
+                for other_id in basket:
+                    if other_id != product_id:
+                        self.co_purchases[product_id][other_id] += 1
+
+    def related(self, product_id, limit=RELATED_LIMIT):
+        """``[(related_id, score), ...]`` for one product, best first."""
+        if product_id not in self.vectors:
+            return []
+
+        vector = self.vectors[product_id]
+        text_scores = Counter()
+        for term, weight in vector.items():
+            for other_id in self.postings.get(term, ()):
+                text_scores[other_id] += weight * self.vectors[other_id][term]
+
+        text_scores.pop(product_id, None)
+        text_scores = dict(text_scores.most_common(TEXT_CANDIDATES))
+
+        co_purchases = self.co_purchases.get(product_id, {})
+        candidates = set(text_scores) | set(co_purchases)
+        candidates.update(self.category_top.get(self.category[product_id], ()))
+        candidates.update(self.brand_top.get(self.brand[product_id], ()))
+        candidates.discard(product_id)
+
+        scored = []
+        for other_id in candidates:
+            score = TEXT_WEIGHT * text_scores.get(other_id, 0.0)
+            if self.category[other_id] == self.category[product_id]:
+                score += CATEGORY_WEIGHT
+            if self.brand[other_id] == self.brand[product_id]:
+                score += BRAND_WEIGHT
+            together = co_purchases.get(other_id)
+            if together:
+                score += COPURCHASE_WEIGHT * together / math.sqrt(
+                    self.order_counts[product_id] * self.order_counts[other_id]
+                )
+            score += POPULARITY_WEIGHT * self.popularity_bonus[other_id]
+            scored.append((score, other_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(other_id, score) for score, other_id in scored[:limit]]
+
+
+def changed_product_ids(since):
+    """
+    Ids of products whose related list may have changed after ``since``:
+    products edited (or added) since then, products in orders placed or
+    updated since then, and products currently listing any of those.
+    """
+    from order_management.models import OrderItem
+    from .models import Product, RelatedProduct
+
+    skus = OrderItem.objects.filter(order__updated_at__gte=since).values('product_sku')
+    product_ids = set(Product.objects.filter(
+        Q(updated_at__gte=since) | Q(sku__in=skus)
+    ).values_list('id', flat=True))
+    product_ids.update(
+        RelatedProduct.objects.filter(related_id__in=product_ids).values_list('product_id', flat=True)
+    )
+    return product_ids
+
+
+def refresh_related(product_ids=None, batch_size=500, now=None, progress=None):
+    """
+    Recompute and store related products for ``product_ids`` (every product
+    when ``None``), ``batch_size`` products per transaction. Inactive
+    products lose their rows. Returns the number of products processed, and
+    moves the catalog version if any were.
+    """
+    from .models import Product, RelatedProduct
+
+    if product_ids is None:
+        product_ids = Product.objects.values_list('id', flat=True)
+    product_ids = sorted(product_ids)
+    now = now or timezone.now()
+    scorer = RelatedProductScorer()
+
+    processed = 0
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        rows = [
+            RelatedProduct(product_id=product_id, related_id=related_id, rank=rank, score=score, computed_at=now)
+            for product_id in batch
+            for rank, (related_id, score) in enumerate(scorer.related(product_id), start=1)
+        ]
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=batch).delete()
+            RelatedProduct.objects.bulk_create(rows)
+        processed += len(batch)
+        if progress:
+            progress(processed)
+    if processed:
+        # Cached product page fragments embed the related products
+        bump_catalog_version()
+    return processed
@@ -0,0 +1,520 @@
+"""
+In-process search indexes for the product catalog.
+
+The inverted index maps normalized tokens to posting lists of product ids so
+storefront search never has to load the whole catalog to answer a query.
+Description text is indexed at a lower weight than the other fields.
+Name and brand words are also indexed by trigram for typo-tolerant matching.
+The suggestion index is a sorted array of name tokens used by autocomplete.
+Both are built lazily on first use and kept current by the handlers in
+``products.signals``.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from django.conf import settings
+
+from .search_cache import search_cache
+
+
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+# Shortest query token that is expanded to every indexed token sharing its prefix
+MIN_PREFIX_LENGTH = 2
+
+
+def trigrams(word):
+    """Padded character trigrams of a word, as used by pg_trgm."""
+    padded = f'  {word} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def tokenize(text):
+    """Split text into case-folded, accent-stripped alphanumeric tokens."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return TOKEN_RE.findall(text)
+
+
+def stem(token):
+    """
+    Strip plural endings ("serums" -> "serum", "brushes" -> "brush").
+
+    Only suffixes are removed, so the stem is always a prefix of the token
+    and prefix matching on it still finds the original word.
+    """
+    if len(token) > 4 and token.endswith(('sses', 'shes', 'ches', 'xes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def normalize_query(query):
+    """Case-folded, stemmed form of a query; equal strings give equal results."""
+    return ' '.join(stem(token) for token in tokenize(query))
+
+
+class InvertedIndex:
+    """
+    Token -> {product_id: weight} posting lists for active products.
+
+    Alongside the postings, every word of a product's name and brand is kept
+    in a trigram -> words map so misspelled queries can be matched by
+    trigram similarity without scanning the vocabulary.
+    """
+
+    FIELD_WEIGHTS = {
+        'name': 3.0,
+        'brand': 2.0,
+        'category': 1.5,
+        'short_description': 1.0,
+        'description': 0.5,
+    }
+
+    # Minimum trigram similarity (shared / union) for a fuzzy word match
+    FUZZY_THRESHOLD = 0.4
+
+    # Relevance is multiplied by (1 + POPULARITY_WEIGHT * ProductPopularity.score)
+    POPULARITY_WEIGHT = 0.1
+
+    def __init__(self, max_age=None):
+        self._lock = threading.RLock()
+        self._max_age = max_age
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)
+        # product_id -> (tokens, recency, brand_id, category_id, fuzzy words, popularity boost)
+        self._documents = {}
+        self._word_products = defaultdict(set)
+        self._word_trigrams = {}
+        self._trigram_words = defaultdict(set)
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._built_at = None
+
+    # Building and maintenance
+
+    def _load_rows(self, **filters):
+        from .models import Product
+        return Product.objects.filter(is_active=True, **filters).values_list(
+            'id', 'brand_id', 'category_id', 'created_at',
+            'name', 'brand__name', 'category__name', 'short_description', 'description',
+            'popularity__score',
+        )
+
+    def build(self):
+        """(Re)build the whole index from the database."""
+        self.load(list(self._load_rows()))
+
+    def load(self, rows):
+        """Replace the index contents with ``rows`` shaped like ``_load_rows``."""
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._add(*row)
+            self._built_at = time.monotonic()
+
+    def ensure_built(self):
+        max_age = self._max_age
+        if max_age is None:
+            max_age = getattr(settings, 'SEARCH_INDEX_MAX_AGE', None)
+        with self._lock:
+            stale = self._built_at is None or (
+                max_age is not None and time.monotonic() - self._built_at > max_age
+            )
+        if stale:
+            self.build()
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on the next query."""
+        with self._lock:
+            self._reset()
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def _add(self, product_id, brand_id, category_id, created_at,
+             name, brand_name, category_name, short_description, description, popularity=None):
+        weights = defaultdict(float)
+        name_tokens = tokenize(name)
+        brand_tokens = tokenize(brand_name)
+        fields = (
+            ('name', name_tokens),
+            ('brand', brand_tokens),
+            ('category', tokenize(category_name)),
+            ('short_description', tokenize(short_description)),
+            ('description', tokenize(description)),
+        )
+        for field, tokens in fields:
+            for token in tokens:
+                weights[token] += self.FIELD_WEIGHTS[field]
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._vocabulary_dirty = True
+            self._postings[token][product_id] = weight
+
+        fuzzy_words = tuple(dict.fromkeys(name_tokens + brand_tokens))
+        for word in fuzzy_words:
+            if word not in self._word_trigrams:
+                grams = trigrams(word)
+                self._word_trigrams[word] = grams
+                for gram in grams:
+                    self._trigram_words[gram].add(word)
+            self._word_products[word].add(product_id)
+
+        recency = created_at.timestamp() if created_at else 0.0
+        boost = 1.0 + self.POPULARITY_WEIGHT * (popularity or 0.0)
+        self._documents[product_id] = (
+            tuple(weights), recency, brand_id, category_id, fuzzy_words, boost,
+        )
+
+    def _discard(self, product_id):
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        for token in document[0]:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(product_id, None)
+            if not posting:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+        for word in document[4]:
+            products = self._word_products.get(word)
+            if products is None:
+                continue
+            products.discard(product_id)
+            if not products:
+                del self._word_products[word]
+                for gram in self._word_trigrams.pop(word):
+                    words = self._trigram_words[gram]
+                    words.discard(word)
+                    if not words:
+                        del self._trigram_words[gram]
+
+    def refresh_products(self, product_ids):
+        """Re-read the given products and update their postings."""
+        if not self.is_built:
+            return
+        product_ids = set(product_ids)
+        rows = list(self._load_rows(id__in=product_ids))
+        with self._lock:
+            for product_id in product_ids:
+                self._discard(product_id)
+            for row in rows:
+                self._add(*row)
+
+    def refresh_brand(self, brand_id):
+        self._refresh_related(2, brand_id=brand_id)
+
+    def refresh_category(self, category_id):
+        self._refresh_related(3, category_id=category_id)
+
+    def _refresh_related(self, position, **filters):
+        if not self.is_built:
+            return
+        rows = list(self._load_rows(**filters))
+        related_id = next(iter(filters.values()))
+        with self._lock:
+            stale_ids = [
+                product_id for product_id, document in self._documents.items()
+                if document[position] == related_id
+            ]
+            for product_id in stale_ids:
+                self._discard(product_id)
+            for row in rows:
+                self._add(*row)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._discard(product_id)
+
+    # Querying
+
+    def _expand(self, token):
+        """Indexed tokens matching a query token, with a match-quality factor."""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [(token, 1.0)] if token in self._postings else []
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        vocabulary = self._vocabulary
+        matches = []
+        position = bisect.bisect_left(vocabulary, token)
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            term = vocabulary[position]
+            matches.append((term, 1.0 if term == token else 0.5))
+            position += 1
+        return matches
+
+    def search(self, query, mode='and'):
+        """
+        Return product ids matching ``query``, best match first.
+
+        ``mode='and'`` requires every query token to match (as a whole token or
+        a token prefix); ``mode='or'`` accepts any. Results are ranked by
+        field-weighted idf score scaled by product popularity, newest product
+        first on ties.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        self.ensure_built()
+
+        with self._lock:
+            total = len(self._documents) or 1
+            per_token = []
+            for token in tokens:
+                matched = {}
+                for term, quality in self._expand(token):
+                    posting = self._postings[term]
+                    idf = math.log(1 + total / len(posting))
+                    for product_id, weight in posting.items():
+                        score = weight * idf * quality
+                        if score > matched.get(product_id, 0.0):
+                            matched[product_id] = score
+                per_token.append(matched)
+
+            if mode == 'and':
+                if not all(per_token):
+                    return []
+                candidates = set(min(per_token, key=len))
+                for matched in per_token:
+                    candidates.intersection_update(matched)
+            else:
+                candidates = set().union(*per_token)
+
+            documents = self._documents
+            ranked = [
+                (sum(matched.get(product_id, 0.0) for matched in per_token) * documents[product_id][5],
+                 documents[product_id][1],
+                 product_id)
+                for product_id in candidates
+            ]
+
+        ranked.sort(reverse=True)
+        return [product_id for _, _, product_id in ranked]
+
+    def _similar_words(self, token, threshold):
+        """
+        Indexed name/brand words whose trigram similarity to ``token`` is at
+        least ``threshold``, as {word: similarity}.
+
+        A word can only reach the threshold if it shares at least
+        ``ceil(threshold * n)`` of the query's ``n`` trigrams, so candidates are
+        gathered from the ``n - required + 1`` rarest query trigrams only and
+        then pruned by trigram-count bounds before the exact check.
+        """
+        query_grams = trigrams(token)
+        size = len(query_grams)
+        required = max(1, math.ceil(threshold * size))
+        ordered = sorted(query_grams, key=lambda gram: len(self._trigram_words.get(gram, ())))
+
+        candidates = set()
+        for gram in ordered[:size - required + 1]:
+            candidates.update(self._trigram_words.get(gram, ()))
+
+        low, high = threshold * size, size / threshold
+        similar = {}
+        for word in candidates:
+            word_grams = self._word_trigrams[word]
+            if not low <= len(word_grams) <= high:
+                continue
+            shared = len(query_grams & word_grams)
+            similarity = shared / (size + len(word_grams) - shared)
+            if similarity >= threshold:
+                similar[word] = similarity
+        return similar
+
+    def fuzzy_search(self, query, threshold=None):
+        """
+        Return product ids whose name or brand words approximately match
+        every query token, best match first.
+
+        Each query token is compared by trigram similarity, so "moisturiser"
+        finds "Moisturizer" and "shampo" finds "Shampoo".
+        """
+        threshold = self.FUZZY_THRESHOLD if threshold is None else threshold
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        self.ensure_built()
+
+        with self._lock:
+            per_token = []
+            for token in tokens:
+                matched = {}
+                for word, similarity in self._similar_words(token, threshold).items():
+                    for product_id in self._word_products[word]:
+                        if similarity > matched.get(product_id, 0.0):
+                            matched[product_id] = similarity
+                if not matched:
+                    return []
+                per_token.append(matched)
+
+            candidates = set(min(per_token, key=len))
+            for matched in per_token:
+                candidates.intersection_update(matched)
+
+            documents = self._documents
+            ranked = [
+                (sum(matched[product_id] for matched in per_token) * documents[product_id][5],
+                 documents[product_id][1],
+                 product_id)
+                for product_id in candidates
+            ]
+
+        ranked.sort(reverse=True)
+        return [product_id for _, _, product_id in ranked]
+
+    def all_ids(self):
+        """Every indexed product id, newest first."""
+        self.ensure_built()
+        with self._lock:
+            ordered = sorted(
+                self._documents.items(), key=lambda item: (item[1][1], item[0]), reverse=True
+            )
+        return [product_id for product_id, _ in ordered]
+
+
+class SuggestionIndex:
+    """
+    Sorted (token, product_id) arrays over product names for autocomplete.
+
+    Lookups bisect the token array for the prefix range and pick the most
+    popular products from it (by ProductPopularity score, then bestseller and
+    featured flags), so no database access happens per keystroke.
+    The arrays are rebuilt wholesale on the first lookup after a change.
+    """
+
+    def __init__(self, max_age=None):
+        self._lock = threading.Lock()
+        self._max_age = max_age
+        self._tokens = []
+        self._ids = []
+        # product_id -> (name, slug, name tokens, ranking key)
+        self._products = {}
+        self._built_at = None
+
+    def invalidate(self):
+        self._built_at = None
+
+    def _is_stale(self):
+        max_age = self._max_age
+        if max_age is None:
+            max_age = getattr(settings, 'SEARCH_INDEX_MAX_AGE', None)
+        built_at = self._built_at
+        return built_at is None or (
+            max_age is not None and time.monotonic() - built_at > max_age
+        )
+
+    def build(self):
+        from .models import Product
+        rows = Product.objects.filter(is_active=True).values_list(
+            'id', 'name', 'slug', 'is_bestseller', 'is_featured', 'created_at',
+            'popularity__score',
+        )
+        products = {}
+        entries = []
+        for product_id, name, slug, is_bestseller, is_featured, created_at, score in rows:
+            tokens = tuple(dict.fromkeys(tokenize(name)))
+            flags = 2 * is_bestseller + is_featured
+            recency = created_at.timestamp() if created_at else 0.0
+            products[product_id] = (name, slug, tokens, (-(score or 0.0), -flags, -recency, product_id))
+            entries.extend((token, product_id) for token in tokens)
+        entries.sort()
+
+        with self._lock:
+            self._tokens = [token for token, _ in entries]
+            self._ids = [product_id for _, product_id in entries]
+            self._products = products
+            self._built_at = time.monotonic()
+
+    def suggest(self, query, limit=8):
+        """
+        Return up to ``limit`` ``{'name', 'slug'}`` dicts for ``query``.
+
+        The last query token is matched as a prefix of any name token; earlier
+        tokens must each prefix some other token of the same name.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        if self._is_stale():
+            self.build()
+
+        tokens_array, ids_array, products = self._tokens, self._ids, self._products
+        *leading, last = tokens
+        low = bisect.bisect_left(tokens_array, last)
+        high = bisect.bisect_left(tokens_array, last + '\uffff', low)
+        candidates = set(ids_array[low:high])
+        for token in leading:
+            candidates = {
+                product_id for product_id in candidates
+                if any(name_token.startswith(token) for name_token in products[product_id][2])
+            }
+
+        best = heapq.nsmallest(limit, candidates, key=lambda product_id: products[product_id][3])
+        return [
+            {'name': products[product_id][0], 'slug': products[product_id][1]}
+            for product_id in best
+        ]
+
+
+product_index = InvertedIndex()
+suggestion_index = SuggestionIndex()
+
+
+def search_product_ids(query):
+    """
+    Ranked product ids for a storefront query.
+
+    Tries an all-tokens match first, then a typo-tolerant match, and finally
+    settles for products matching any token. Results are cached per
+    normalized query until the catalog changes.
+    """
+    normalized = normalize_query(query)
+    if not normalized:
+        return []
+
+    def compute():
+        return (
+            product_index.search(normalized, mode='and')
+            or product_index.fuzzy_search(normalized)
+            or product_index.search(normalized, mode='or')
+        )
+
+    return search_cache.get_or_compute('ids', normalized, compute)
+
+
+def suggest_products(query, limit=8):
+    """Cached autocomplete suggestions for a partially typed query."""
+    normalized = normalize_query(query)
+    if not normalized:
+        return []
+    return search_cache.get_or_compute(
+        'suggestions', (normalized, limit),
+        lambda: suggestion_index.suggest(normalized, limit=limit),
+    )
+
+
+def hydrate(product_ids, queryset=None):
+    """Load card-ready products for ``product_ids``, preserving their order."""
+    from .models import Product
+    if queryset is None:
+        queryset = Product.objects.for_cards()
+    products = queryset.in_bulk(list(product_ids))
+    return [products[product_id] for product_id in product_ids if product_id in products]
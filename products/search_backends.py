@@ -0,0 +1,225 @@
+"""
+Pluggable product search backends.
+
+``get_search_backend()`` returns the backend named by ``SEARCH_BACKEND``:
+
+* ``InMemorySearchBackend`` (default) answers from the per-process inverted
+  index in ``products.search``.
+* ``SQLiteFTS5SearchBackend`` and ``MySQLFullTextSearchBackend`` keep the
+  search text in ``ProductSearchDocument`` and query the database's full-text
+  index over it, so every worker shares one index. They match whole words and
+  prefixes only: unlike the in-memory index they do not correct typos.
+
+All backends return product ids ranked by relevance.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+from .search import (
+    InvertedIndex, normalize_query, product_index, search_product_ids, tokenize,
+)
+from .search_cache import search_cache
+
+
+# Same popularity scaling as the in-memory index
+POPULARITY_WEIGHT = InvertedIndex.POPULARITY_WEIGHT
+
+
+class SearchBackend:
+    """Interface shared by all product search backends."""
+
+    def search(self, query, limit=None):
+        """Return ids of active products matching ``query``, best first."""
+        raise NotImplementedError
+
+    def update_products(self, product_ids):
+        """Reindex the given products after they were saved."""
+
+    def update_brand(self, brand_id):
+        """Reindex every product of a brand after the brand changed."""
+
+    def update_category(self, category_id):
+        """Reindex every product of a category after the category changed."""
+
+    def remove_products(self, product_ids):
+        """Drop deleted products from the index."""
+
+    def rebuild(self, batch_size=500, progress=None):
+        """Rebuild the index from scratch, ``batch_size`` products at a time."""
+        raise NotImplementedError
+
+
+class InMemorySearchBackend(SearchBackend):
+    """Per-process inverted index; kept current by ``products.signals``."""
+
+    def search(self, query, limit=None):
+        product_ids = search_product_ids(query)
+        return product_ids[:limit] if limit is not None else product_ids
+
+    def rebuild(self, batch_size=500, progress=None):
+        product_index.build()
+        if progress:
+            progress(len(product_index.all_ids()))
+
+
+class DatabaseSearchBackend(SearchBackend):
+    """Base for backends that index ``ProductSearchDocument`` rows in the database."""
+
+    cache_namespace = None
+
+    def _document_rows(self, **filters):
+        from .models import Product
+        return Product.objects.filter(is_active=True, **filters).values_list(
+            'id', 'name', 'brand__name', 'category__name', 'short_description', 'description',
+            'popularity__score',
+        )
+
+    def _write_documents(self, stale_ids, rows):
+        from .models import ProductSearchDocument
+        documents = [
+            ProductSearchDocument(
+                product_id=product_id,
+                name=name,
+                brand=brand_name,
+                category=category_name,
+                body=f"{short_description}\n{description}".strip(),
+                popularity=popularity or 0.0,
+            )
+            for product_id, name, brand_name, category_name, short_description, description, popularity in rows
+        ]
+        with transaction.atomic():
+            ProductSearchDocument.objects.filter(product_id__in=stale_ids).delete()
+            ProductSearchDocument.objects.bulk_create(documents)
+
+    def update_products(self, product_ids):
+        product_ids = list(product_ids)
+        self._write_documents(product_ids, list(self._document_rows(id__in=product_ids)))
+
+    def update_brand(self, brand_id):
+        from .models import Product
+        self.update_products(Product.objects.filter(brand_id=brand_id).values_list('id', flat=True))
+
+    def update_category(self, category_id):
+        from .models import Product
+        self.update_products(Product.objects.filter(category_id=category_id).values_list('id', flat=True))
+
+    def remove_products(self, product_ids):
+        from .models import ProductSearchDocument
+        ProductSearchDocument.objects.filter(product_id__in=list(product_ids)).delete()
+
+    def rebuild(self, batch_size=500, progress=None):
+        from .models import ProductSearchDocument
+        last_id = 0
+        indexed = 0
+        while True:
+            rows = list(self._document_rows(id__gt=last_id).order_by('id')[:batch_size])
+            if not rows:
+                break
+            self._write_documents([row[0] for row in rows], rows)
+            last_id = rows[-1][0]
+            indexed += len(rows)
+            if progress:
+                progress(indexed)
+        ProductSearchDocument.objects.exclude(product__is_active=True).delete()
+        self._after_rebuild()
+
+    def _after_rebuild(self):
+        pass
+
+    def search(self, query, limit=None):
+        normalized = normalize_query(query)
+        if not normalized:
+            return []
+        # Not the per-process LRU: the catalog version it is keyed on lives in
+        # the default cache, which is per-process too unless CACHES is shared,
+        # so a write in one worker would not reach the others' cached results.
+        # Results are cached only in SEARCH_CACHE_ALIAS, when one is configured.
+        return search_cache.get_or_compute(
+            self.cache_namespace, (normalized, limit),
+            lambda: self._search(tokenize(normalized), limit),
+            local=False,
+        )
+
+    def _search(self, tokens, limit):
+        raise NotImplementedError
+
+
+class SQLiteFTS5SearchBackend(DatabaseSearchBackend):
+    """
+    SQLite FTS5 table ``products_product_fts`` with ``ProductSearchDocument``
+    as external content; triggers created by the migrations keep it in sync.
+    Ranked by bm25 with name, brand, category and body weighted 10/5/3/1,
+    scaled by the popularity stored on the same document row.
+    """
+
+    cache_namespace = 'fts5'
+    table = 'products_product_fts'
+
+    def _match(self, tokens, operator):
+        # Quote every token so FTS5 syntax characters are taken literally
+        return f' {operator} '.join(f'"{token}"*' for token in tokens)
+
+    def _search(self, tokens, limit):
+        # bm25() is negative (lower is better), so scaling it up ranks popular products first
+        sql = (
+            f"SELECT fts.rowid FROM {self.table} AS fts "
+            f"JOIN products_productsearchdocument AS doc ON doc.product_id = fts.rowid "
+            f"WHERE {self.table} MATCH %s "
+            f"ORDER BY bm25({self.table}, 10.0, 5.0, 3.0, 1.0) * (1 + {POPULARITY_WEIGHT} * doc.popularity)"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with connection.cursor() as cursor:
+            for operator in ('AND', 'OR'):
+                cursor.execute(sql, [self._match(tokens, operator)])
+                product_ids = [product_id for product_id, in cursor.fetchall()]
+                if product_ids or len(tokens) == 1:
+                    return product_ids
+        return []
+
+    def _after_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+
+
+class MySQLFullTextSearchBackend(DatabaseSearchBackend):
+    """
+    MySQL FULLTEXT index over ``ProductSearchDocument`` (name, brand,
+    category, body). Boolean mode selects prefix matches on every token;
+    natural-language relevance scaled by the document's popularity orders them.
+    """
+
+    cache_namespace = 'mysql_fulltext'
+    columns = 'name, brand, category, body'
+
+    def _search(self, tokens, limit):
+        sql = (
+            f"SELECT product_id FROM products_productsearchdocument "
+            f"WHERE MATCH({self.columns}) AGAINST (%s IN BOOLEAN MODE) "
+            f"ORDER BY MATCH({self.columns}) AGAINST (%s IN NATURAL LANGUAGE MODE) "
+            f"* (1 + {POPULARITY_WEIGHT} * popularity) DESC, product_id DESC"
+        )
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        natural = ' '.join(tokens)
+        with connection.cursor() as cursor:
+            for required in ('+', ''):
+                boolean = ' '.join(f'{required}{token}*' for token in tokens)
+                cursor.execute(sql, [boolean, natural])
+                product_ids = [product_id for product_id, in cursor.fetchall()]
+                if product_ids or len(tokens) == 1:
+                    return product_ids
+        return []
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', 'products.search_backends.InMemorySearchBackend')
+        _backend = import_string(path)()
+    return _backend
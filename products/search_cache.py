@@ -0,0 +1,110 @@
+"""
+Two-tier cache for search and autocomplete results.
+
+Results are cached per normalized query in a bounded in-process LRU with a
+TTL, and optionally in a shared Django cache (``SEARCH_CACHE_ALIAS``) so
+other workers can reuse them. Every key embeds the global catalog version,
+which the Product/Brand/Category signals bump, so entries computed against
+an older catalog are never served. The version is a ``CacheVersion`` row, so
+a bump made by any worker or management command reaches every process.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+CATALOG_VERSION = 'catalog'
+
+
+def catalog_version():
+    """Current catalog version, shared by every process."""
+    from .models import CacheVersion
+    return CacheVersion.current(CATALOG_VERSION)
+
+
+def bump_catalog_version():
+    """Invalidate every cached search result by moving to a new version."""
+    from .models import CacheVersion
+    CacheVersion.bump([CATALOG_VERSION])
+
+
+class SearchResultCache:
+    """Bounded LRU of computed results with a TTL, backed by an optional shared cache."""
+
+    def __init__(self, max_entries=None, timeout=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._timeout = timeout
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'SEARCH_CACHE_MAX_ENTRIES', 512)
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, 'SEARCH_CACHE_TIMEOUT', 300)
+
+    def _shared_cache(self):
+        alias = getattr(settings, 'SEARCH_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def get_or_compute(self, namespace, key, compute, local=True):
+        """
+        Return the cached value for ``(namespace, key)`` at the current
+        catalog version, calling ``compute()`` and storing its result on a miss.
+
+        With ``local=False`` only the shared cache is used (and nothing is
+        cached without one), for results that must not outlive a catalog
+        change made by another worker.
+        """
+        shared = self._shared_cache()
+        if not local and shared is None:
+            return compute()
+        digest = hashlib.md5(repr(key).encode()).hexdigest()
+        cache_key = f'search:{namespace}:{catalog_version()}:{digest}'
+        now = time.monotonic()
+
+        if not local:
+            value = shared.get(cache_key)
+            if value is None:
+                value = compute()
+                shared.set(cache_key, value, self.timeout)
+            return value
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(cache_key)
+                    return value
+                del self._entries[cache_key]
+
+        value = shared.get(cache_key) if shared is not None else None
+        if value is None:
+            value = compute()
+            if shared is not None:
+                shared.set(cache_key, value, self.timeout)
+
+        with self._lock:
+            self._entries[cache_key] = (now + self.timeout, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+search_cache = SearchResultCache()
@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Product, Brand, Category, ProductImage
+from .facets import facet_index
+from .page_cache import touch_product
+from .search import product_index, suggestion_index
+from .search_backends import get_search_backend
+from .search_cache import bump_catalog_version
+
+
+# Indexes are refreshed and the catalog version bumped only once the edit has
+# committed: reading earlier would index (and cache under the new version)
+# rows the transaction may still change, such as a moved category's subtree.
+
+@receiver(post_save, sender=Product)
+def reindex_product(sender, instance, **kwargs):
+    product_id = instance.pk
+
+    def reindex():
+        product_index.refresh_products([product_id])
+        suggestion_index.invalidate()
+        facet_index.refresh_products([product_id])
+        get_search_backend().update_products([product_id])
+        bump_catalog_version()
+
+    transaction.on_commit(reindex)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    product_id = instance.pk
+
+    def unindex():
+        product_index.remove_product(product_id)
+        suggestion_index.invalidate()
+        facet_index.remove_product(product_id)
+        get_search_backend().remove_products([product_id])
+        bump_catalog_version()
+
+    transaction.on_commit(unindex)
+
+
+@receiver([post_save, post_delete], sender=Brand)
+def reindex_brand_products(sender, instance, **kwargs):
+    brand_id = instance.pk
+
+    def reindex():
+        product_index.refresh_brand(brand_id)
+        get_search_backend().update_brand(brand_id)
+        bump_catalog_version()
+
+    transaction.on_commit(reindex)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def reindex_category_products(sender, instance, **kwargs):
+    category_id = instance.pk
+
+    def reindex():
+        product_index.refresh_category(category_id)
+        get_search_backend().update_category(category_id)
+        bump_catalog_version()
+
+    transaction.on_commit(reindex)
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def touch_product_images(sender, instance, **kwargs):
+    # The product page fragments are keyed on Product.updated_at
+    touch_product(instance.product_id)
+    # Cached search results and live-search ETags embed image URLs
+    transaction.on_commit(bump_catalog_version)
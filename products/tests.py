@@ -1,3 +1,184 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .views import _parse_price
+
+
+class ParsePriceTests(SimpleTestCase):
+    def test_parses_decimal(self):
+        self.assertEqual(_parse_price('499.50'), Decimal('499.50'))
+
+    def test_blank_and_garbage_are_ignored(self):
+        for value in (None, '', 'abc'):
+            with self.subTest(value=value):
+                self.assertIsNone(_parse_price(value))
+
+    def test_non_finite_values_are_ignored(self):
+        for value in ('nan', 'NaN', 'sNaN', 'inf', 'Infinity', '-Infinity'):
+            with self.subTest(value=value):
+                self.assertIsNone(_parse_price(value))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class NonFinitePriceFilterTests(TestCase):
+    def test_listing_pages_ignore_non_finite_prices(self):
+        for url in ('/products/', '/products/filter/'):
+            for value in ('nan', 'sNaN', 'inf'):
+                with self.subTest(url=url, value=value):
+                    response = self.client.get(url, {'price_min': value, 'price_max': value})
+                    self.assertEqual(response.status_code, 200)
+
+
+class CategoryTreeTests(TestCase):
+    def test_move_reaches_cached_tree_once_committed(self):
+        from .category_tree import category_tree
+        from .models import Category
+
+        with self.captureOnCommitCallbacks(execute=True):
+            skincare = Category.objects.create(name='Skincare', slug='skincare')
+            serums = Category.objects.create(name='Serums', slug='serums', parent=skincare)
+            makeup = Category.objects.create(name='Makeup', slug='makeup')
+        self.assertEqual([node['slug'] for node in category_tree().breadcrumbs(serums.id)], ['skincare', 'serums'])
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            serums.parent = makeup
+            serums.save()
+            # Not committed yet: readers keep the old tree, cached under the old version
+            self.assertEqual([node['slug'] for node in category_tree().breadcrumbs(serums.id)], ['skincare', 'serums'])
+        for callback in callbacks:
+            callback()
+        self.assertEqual([node['slug'] for node in category_tree().breadcrumbs(serums.id)], ['makeup', 'serums'])
+
+
+class SearchResultCacheTests(SimpleTestCase):
+    def test_shared_only_results_are_not_kept_per_process(self):
+        from .search_cache import SearchResultCache
+
+        cache = SearchResultCache(max_entries=10, timeout=60)
+        calls = []
+        compute = lambda: calls.append(1) or [1, 2]
+        with override_settings(SEARCH_CACHE_ALIAS=None):
+            cache.get_or_compute('db', 'serum', compute, local=False)
+            cache.get_or_compute('db', 'serum', compute, local=False)
+        self.assertEqual(len(calls), 2)
+
+
+class ReviewVersionTests(TestCase):
+    def test_rating_change_invalidates_pages_listing_the_product(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from review_system.models import Review
+
+        from .models import Brand, Category, Product, RelatedProduct
+        from .page_cache import review_version
+
+        brand = Brand.objects.create(name='Bloom', slug='bloom')
+        category = Category.objects.create(name='Serums', slug='serums')
+        page, rated, unrelated = [
+            Product.objects.create(
+                name=name, slug=name.lower(), sku=name.upper(), brand=brand, category=category,
+                product_type='skincare', description=name, price=Decimal('500.00'),
+            )
+            for name in ('Page', 'Rated', 'Unrelated')
+        ]
+        RelatedProduct.objects.create(product=page, related=rated, rank=1, score=1.0)
+        before = review_version(page.id), review_version(unrelated.id)
+
+        user = get_user_model().objects.create_user(username='reviewer', password='secret')
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(user=user, product=rated, rating=4, title='Nice', comment='Nice serum')
+
+        # Stored in the database, so other workers (with their own caches) see the bump too
+        cache.clear()
+        self.assertNotEqual(review_version(page.id), before[0])
+        self.assertEqual(review_version(unrelated.id), before[1])
+
+
+class InvertedIndexTests(SimpleTestCase):
+    def test_description_words_match_below_name_words(self):
+        from django.utils import timezone
+
+        from .search import InvertedIndex
+
+        now = timezone.now()
+        index = InvertedIndex()
+        index.load([
+            (1, 1, 1, now, 'Rose Serum', 'Bloom', 'Serums', '', 'A light serum with niacinamide.', None),
+            (2, 1, 1, now, 'Niacinamide Toner', 'Bloom', 'Toners', '', 'A daily toner.', None),
+            (3, 1, 1, now, 'Clay Mask', 'Bloom', 'Masks', '', 'A weekly mask.', None),
+        ])
+        self.assertEqual(index.search('niacinamide'), [2, 1])
+
+
+class CatalogVersionTests(TestCase):
+    def test_bump_is_stored_in_the_database(self):
+        from django.core.cache import cache
+
+        from .models import CacheVersion
+        from .search_cache import bump_catalog_version, catalog_version
+
+        before = catalog_version()
+        bump_catalog_version()
+        # A process with its own empty cache still reads the new version
+        cache.clear()
+        self.assertEqual(catalog_version(), before + 1)
+        self.assertEqual(CacheVersion.current_many(['catalog', 'unknown']), {'catalog': before + 1, 'unknown': 1})
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class MalformedCursorTests(TestCase):
+    CURSORS = [
+        [[1], 1], [{'a': 1}, 1], [None, 1], ['2026-01-01', None], ['', 1],
+        [True, 1], [1e400, 1], ['2026-01-01', 10 ** 30], 'not a list', [1],
+    ]
+
+    def test_decode_cursor_rejects_non_scalar_values(self):
+        from .pagination import decode_cursor, encode_cursor
+
+        self.assertEqual(decode_cursor(encode_cursor(['2026-01-01T00:00:00', 3])), ['2026-01-01T00:00:00', 3])
+        for values in ([[1], 1], [{'a': 1}, 1], [None, 1], [True, 1], 'not a list'):
+            with self.subTest(values=values):
+                self.assertIsNone(decode_cursor(encode_cursor(values)))
+
+    def test_brand_page_serves_first_page_for_malformed_cursors(self):
+        from .models import Brand
+        from .pagination import encode_cursor
+
+        Brand.objects.create(name='Bloom', slug='bloom')
+        for values in self.CURSORS:
+            for sort in ('newest', 'price_low'):
+                for direction in ('after', 'before'):
+                    with self.subTest(values=values, sort=sort, direction=direction):
+                        response = self.client.get(
+                            '/products/brand/bloom/', {'sort': sort, direction: encode_cursor(values)},
+                        )
+                        self.assertEqual(response.status_code, 200)
+
+
+class RefreshRelatedTests(TestCase):
+    def test_refresh_moves_the_catalog_version(self):
+        from .models import Brand, Category, Product, RelatedProduct
+        from .related import refresh_related
+        from .search_cache import catalog_version
+
+        brand = Brand.objects.create(name='Bloom', slug='bloom')
+        category = Category.objects.create(name='Serums', slug='serums')
+        for name in ('Rose Serum', 'Jasmine Serum'):
+            Product.objects.create(
+                name=name, slug=name.lower().replace(' ', '-'), sku=name.upper().replace(' ', '-'),
+                brand=brand, category=category, product_type='skincare', description=name, price=Decimal('500.00'),
+            )
+        before = catalog_version()
+
+        self.assertEqual(refresh_related(), 2)
+        self.assertTrue(RelatedProduct.objects.exists())
+        self.assertEqual(catalog_version(), before + 1)
+
+
+class GenerateImageVariantsTests(SimpleTestCase):
+    def test_zero_workers_is_rejected(self):
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaisesMessage(CommandError, '--workers and --batch-size must be positive'):
+            call_command('generate_image_variants', workers=0)
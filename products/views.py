@@ -1,118 +1,186 @@
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
 from .models import Product, Category, Brand
+from .category_tree import category_tree
+from .facets import facet_index, ATTRIBUTE_FACETS
+from .page_cache import review_version
+from .pagination import SORT_CHOICES, get_sort, paginate_ids, paginate_queryset
+from .search import hydrate
+from .search_backends import get_search_backend
+from .search_cache import catalog_version
+from review_system.feed import paginate_reviews
 
-# Create your views here.
+ATTRIBUTE_LABELS = {
+    'is_organic': 'Organic',
+    'is_vegan': 'Vegan',
+    'is_cruelty_free': 'Cruelty Free',
+}
 
-def product_list(request):
-    """Display all products with optional filtering"""
-    products = Product.objects.filter(is_active=True)
-    
-    # Get filter parameters
-    category = request.GET.get('category')
-    brand = request.GET.get('brand')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
+
+def _parse_price(value):
+    try:
+        price = Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+    # NaN and infinities cannot be compared with bucket bounds
+    return price if price is not None and price.is_finite() else None
+
+
+def _faceted_context(params):
+    """
+    Filter products from GET parameters with the facet index and annotate
+    every filter option with the number of results it would give.
+    """
+    categories = list(Category.objects.filter(is_active=True))
+    brands = list(Brand.objects.filter(is_active=True))
     
+    filters = {}
+    category = params.get('category')
+    brand = params.get('brand')
+    product_type = params.get('product_type')
+    # Unknown slugs map to an id that matches nothing
     if category:
-        products = products.filter(category__slug=category)
+        filters['category'] = next((c.id for c in categories if c.slug == category), -1)
     if brand:
-        products = products.filter(brand__slug=brand)
-    if price_min:
-        products = products.filter(price__gte=price_min)
-    if price_max:
-        products = products.filter(price__lte=price_max)
+        filters['brand'] = next((b.id for b in brands if b.slug == brand), -1)
+    if product_type:
+        filters['product_type'] = product_type
+    filters['price_min'] = _parse_price(params.get('price_min'))
+    filters['price_max'] = _parse_price(params.get('price_max'))
+    for attribute in ATTRIBUTE_FACETS:
+        filters[attribute] = params.get(attribute) in ('1', 'on', 'true')
     
-    context = {
-        'products': products,
-        'categories': Category.objects.filter(is_active=True),
-        'brands': Brand.objects.filter(is_active=True),
+    sort = get_sort(params)
+    result = facet_index.query(sort=sort, **filters)
+    counts = result.counts
+    page_obj = paginate_ids(result.product_ids, params)
+    
+    for category_obj in categories:
+        category_obj.product_count = counts['category'].get(category_obj.id, 0)
+    for brand_obj in brands:
+        brand_obj.product_count = counts['brand'].get(brand_obj.id, 0)
+    product_types = [
+        (value, label, counts['product_type'].get(value, 0))
+        for value, label in Product.PRODUCT_TYPE_CHOICES
+    ]
+    attributes = [
+        (attribute, ATTRIBUTE_LABELS[attribute], counts[attribute].get(True, 0))
+        for attribute in ATTRIBUTE_FACETS
+    ]
+    
+    return {
+        'products': hydrate(page_obj.object_list),
+        'page_obj': page_obj,
+        'total_results': len(result.product_ids),
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
+        'categories': categories,
+        'brands': brands,
+        'product_types': product_types,
+        'attributes': attributes,
     }
+
+
+def product_list(request):
+    """Display all products with optional filtering and facet counts"""
+    context = _faceted_context(request.GET)
     return render(request, 'products/product_list.html', context)
 
+def _related_products(product, limit=4):
+    """
+    Precomputed neighbours of ``product`` (manage.py refresh_related_products),
+    or products from the same category until its list has been computed.
+    """
+    related = list(Product.objects.for_cards().related_to(product).filter(is_active=True)[:limit])
+    if not related:
+        related = list(Product.objects.for_cards().filter(
+            category=product.category,
+            is_active=True
+        ).exclude(id=product.id)[:limit])
+    return related
+
 def product_detail(request, slug):
     """Display detailed product information"""
-    product = get_object_or_404(Product, slug=slug, is_active=True)
-    related_products = Product.objects.filter(
-        category=product.category,
-        is_active=True
-    ).exclude(id=product.id)[:4]
-    active_reviews = product.reviews.filter(is_active=True).order_by('-created_at')
+    product = get_object_or_404(
+        Product.objects.select_related('brand', 'category', 'rating_summary'),
+        slug=slug, is_active=True
+    )
+    # Only evaluated when their cached template fragment misses
+    related_products = SimpleLazyObject(lambda: _related_products(product))
+    # First page of reviews; the rest is loaded from the review feed on scroll
+    review_page = SimpleLazyObject(lambda: paginate_reviews(product, {}, default_size=5)[0])
     
     context = {
         'product': product,
         'related_products': related_products,
-        'active_reviews': active_reviews,
+        'review_page': review_page,
+        'review_version': review_version(product.id),
+        'catalog_version': catalog_version(),
+        'fragment_cache_timeout': settings.PRODUCT_FRAGMENT_CACHE_TIMEOUT,
+        'shared_fragment_cache_timeout': settings.PRODUCT_SHARED_FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'products/product_detail.html', context)
 
 def category_products(request, slug):
-    """Display products from a specific category"""
+    """Display products from a category and all of its subcategories"""
     category = get_object_or_404(Category, slug=slug, is_active=True)
-    products = Product.objects.filter(category=category, is_active=True)
+    tree = category_tree()
+    sort = get_sort(request.GET)
+    page_obj = paginate_queryset(
+        Product.objects.for_cards().in_category_tree(category).filter(is_active=True), request.GET, sort
+    )
     
     context = {
         'category': category,
-        'products': products,
+        'breadcrumbs': tree.breadcrumbs(category.id),
+        'subcategories': tree.children(category.id),
+        'products': page_obj.object_list,
+        'page_obj': page_obj,
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
     }
     return render(request, 'products/category_products.html', context)
 
 def brand_products(request, slug):
     """Display products from a specific brand"""
     brand = get_object_or_404(Brand, slug=slug, is_active=True)
-    products = Product.objects.filter(brand=brand, is_active=True)
+    sort = get_sort(request.GET)
+    page_obj = paginate_queryset(
+        Product.objects.for_cards().filter(brand=brand, is_active=True), request.GET, sort
+    )
     
     context = {
         'brand': brand,
-        'products': products,
+        'products': page_obj.object_list,
+        'page_obj': page_obj,
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
     }
     return render(request, 'products/brand_products.html', context)
 
 def search_products(request):
-    """Search products by name, description, or brand"""
+    """
+    Search products by name, brand, category or description. The default
+    in-memory backend tolerates typos; the database full-text backends do not.
+    """
     query = request.GET.get('q', '')
     products = []
+    page_obj = None
     
     if query:
-        products = Product.objects.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(brand__name__icontains=query) |
-            Q(category__name__icontains=query),
-            is_active=True
-        )
+        page_obj = paginate_ids(get_search_backend().search(query), request.GET)
+        products = hydrate(page_obj.object_list)
     
     context = {
         'products': products,
+        'page_obj': page_obj,
         'query': query,
     }
     return render(request, 'products/search_results.html', context)
 
 def filter_products(request):
     """Filter products by various criteria"""
-    products = Product.objects.filter(is_active=True)
-    
-    # Apply filters
-    category = request.GET.get('category')
-    brand = request.GET.get('brand')
-    price_min = request.GET.get('price_min')
-    price_max = request.GET.get('price_max')
-    product_type = request.GET.get('product_type')
-    
-    if category:
-        products = products.filter(category__slug=category)
-    if brand:
-        products = products.filter(brand__slug=brand)
-    if price_min:
-        products = products.filter(price__gte=price_min)
-    if price_max:
-        products = products.filter(price__lte=price_max)
-    if product_type:
-        products = products.filter(product_type=product_type)
-    
-    context = {
-        'products': products,
-        'categories': Category.objects.filter(is_active=True),
-        'brands': Brand.objects.filter(is_active=True),
-    }
+    context = _faceted_context(request.GET)
     return render(request, 'products/filtered_products.html', context)
@@ -5,3 +5,7 @@ class ReviewSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'review_system'
     verbose_name = 'Review System'
+
+    def ready(self):
+        # Keep ProductRatingSummary and the product page review fragments in sync with reviews
+        from . import signals  # noqa: F401
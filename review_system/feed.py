@@ -0,0 +1,41 @@
+"""
+Keyset-paginated review listings shared by the product page, the reviews
+page and the JSON review feed.
+"""
+from products.pagination import get_sort, paginate_queryset
+
+from .models import Review
+
+
+# Review sort option -> ordering, served by the (product, ...) indexes on Review
+REVIEW_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'helpful': ('-helpful_votes', '-created_at', '-id'),
+    'rating_high': ('-rating', '-created_at', '-id'),
+    'rating_low': ('rating', '-created_at', '-id'),
+}
+
+REVIEW_SORT_CHOICES = [
+    ('newest', 'Newest'),
+    ('helpful', 'Most Helpful'),
+    ('rating_high', 'Highest Rating'),
+    ('rating_low', 'Lowest Rating'),
+]
+
+REVIEW_PAGE_SIZE = 10
+REVIEW_MAX_PAGE_SIZE = 50
+
+
+def paginate_reviews(product, params, default_size=REVIEW_PAGE_SIZE):
+    """One keyset page of a product's active reviews, with authors and images loaded in bulk."""
+    sort = get_sort(params, REVIEW_ORDERINGS)
+    reviews = (
+        Review.objects.filter(product=product, is_active=True)
+        .select_related('user')
+        .prefetch_related('images')
+    )
+    page_obj = paginate_queryset(
+        reviews, params, sort, orderings=REVIEW_ORDERINGS,
+        default_size=default_size, max_size=REVIEW_MAX_PAGE_SIZE,
+    )
+    return page_obj, sort
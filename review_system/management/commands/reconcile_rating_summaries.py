@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from review_system.models import ProductRatingSummary
+
+
+class Command(BaseCommand):
+    help = "Recompute product rating summaries from reviews and repair any that have drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Products checked per batch')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Reconciling product rating summaries..."))
+        batch_size = options['batch_size']
+        last_id = 0
+        checked = repaired = 0
+        while True:
+            product_ids = list(
+                Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not product_ids:
+                break
+            repaired += ProductRatingSummary.reconcile(product_ids)
+            checked += len(product_ids)
+            last_id = product_ids[-1]
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} products, repaired {repaired} summaries."))
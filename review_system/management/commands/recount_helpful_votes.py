@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from review_system.models import Review
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every review's helpful votes from ReviewVote and correct any drift. "
+        "Votes are counted incrementally as they are cast; run this periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Reviews checked per UPDATE')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING("Recounting review helpful votes..."))
+        batch_size = options['batch_size']
+        last_id = Review.objects.aggregate(last=Max('id'))['last'] or 0
+        corrected = 0
+        for start in range(0, last_id, batch_size):
+            corrected += Review.recount_helpful_votes(
+                Review.objects.filter(id__gt=start, id__lte=start + batch_size)
+            )
+        self.stdout.write(self.style.SUCCESS(f"Corrected helpful votes on {corrected} reviews."))
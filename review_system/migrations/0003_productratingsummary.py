@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_summaries(apps, schema_editor):
+    Review = apps.get_model('review_system', 'Review')
+    ProductRatingSummary = apps.get_model('review_system', 'ProductRatingSummary')
+    summaries = {}
+    histogram = (
+        Review.objects.filter(is_active=True)
+        .values('product_id', 'rating').annotate(count=Count('id'))
+        .values_list('product_id', 'rating', 'count')
+    )
+    for product_id, rating, count in histogram:
+        summary = summaries.setdefault(product_id, ProductRatingSummary(product_id=product_id))
+        setattr(summary, f'stars_{rating}', count)
+        summary.review_count += count
+        summary.rating_sum += rating * count
+    for summary in summaries.values():
+        summary.average_rating = summary.rating_sum / summary.review_count
+    ProductRatingSummary.objects.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_productpopularity'),
+        ('review_system', '0002_review_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='products.product')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0.0)),
+                ('stars_1', models.IntegerField(default=0)),
+                ('stars_2', models.IntegerField(default=0)),
+                ('stars_3', models.IntegerField(default=0)),
+                ('stars_4', models.IntegerField(default=0)),
+                ('stars_5', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Rating Summary',
+                'verbose_name_plural': 'Product Rating Summaries',
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
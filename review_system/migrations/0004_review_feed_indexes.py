@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_productpopularity'),
+        ('review_system', '0003_productratingsummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-helpful_votes', '-created_at'], name='review_syst_product_9af7bc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-rating', '-created_at'], name='review_syst_product_c4d023_idx'),
+        ),
+    ]
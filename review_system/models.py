@@ -1,7 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
 
 
 class Review(models.Model):
@@ -24,6 +26,9 @@ class Review(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['product', '-created_at']),
+            # Review feed sorted by most helpful / by rating
+            models.Index(fields=['product', '-helpful_votes', '-created_at']),
+            models.Index(fields=['product', '-rating', '-created_at']),
         ]
     
     def __str__(self):
@@ -40,16 +45,49 @@ class Review(models.Model):
         }
         return labels.get(self.rating, 'Not rated')
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the stored row contributes to ProductRatingSummary
+        if {'product_id', 'rating', 'is_active'}.issubset(field_names):
+            instance._rating_state = instance.rating_state()
+        return instance
+    
+    def rating_state(self):
+        """(product_id, rating) counted in the product's rating summary, or None if not counted."""
+        return (self.product_id, self.rating) if self.is_active else None
+    
+    @classmethod
+    def add_helpful_votes(cls, review_id, delta):
+        """Atomically adjust a review's helpful vote count, never below zero."""
+        cls.objects.filter(pk=review_id).update(
+            helpful_votes=Greatest(F('helpful_votes') + delta, Value(0))
+        )
+    
+    @classmethod
+    def recount_helpful_votes(cls, reviews=None):
+        """
+        Reset ``helpful_votes`` to the exact number of 'helpful' ReviewVotes
+        for ``reviews`` (all reviews by default) where they differ. Returns the
+        number of reviews corrected.
+        """
+        reviews = cls.objects.all() if reviews is None else reviews
+        actual = Coalesce(
+            Subquery(
+                ReviewVote.objects.filter(review=OuterRef('pk'), vote_type='helpful')
+                .values('review').annotate(count=Count('id')).values('count')
+            ),
+            Value(0),
+        )
+        return reviews.annotate(actual=actual).exclude(helpful_votes=F('actual')).update(helpful_votes=actual)
+    
     def save(self, *args, **kwargs):
         # Check if user has purchased this product
         if not self.is_verified_purchase:
-            from order_management.models import Order, OrderItem
-            purchased = OrderItem.objects.filter(
-                order__user=self.user,
-                order__status__in=['delivered', 'completed'],
-                product_sku=self.product.sku
+            from order_management.models import UserProductPurchase
+            self.is_verified_purchase = UserProductPurchase.objects.filter(
+                user_id=self.user_id, product_id=self.product_id
             ).exists()
-            self.is_verified_purchase = purchased
         super().save(*args, **kwargs)
 
 
@@ -86,11 +124,127 @@ class ReviewVote(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.vote_type} on {self.review}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored vote so save() can count only the change
+        if 'vote_type' in field_names:
+            instance._stored_vote_type = instance.vote_type
+        return instance
+    
     def save(self, *args, **kwargs):
-        # Update helpful votes count
-        if self.vote_type == 'helpful':
-            self.review.helpful_votes += 1
-        else:
-            self.review.helpful_votes = max(0, self.review.helpful_votes - 1)
-        self.review.save()
-        super().save(*args, **kwargs)
+        # Review.helpful_votes counts 'helpful' votes; apply the change with a
+        # single UPDATE instead of re-saving the review
+        old_type = None if self._state.adding else getattr(self, '_stored_vote_type', None)
+        delta = (self.vote_type == 'helpful') - (old_type == 'helpful')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if delta:
+                Review.add_helpful_votes(self.review_id, delta)
+        self._stored_vote_type = self.vote_type
+    
+    def delete(self, *args, **kwargs):
+        old_type = getattr(self, '_stored_vote_type', self.vote_type)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if old_type == 'helpful':
+                Review.add_helpful_votes(self.review_id, -1)
+        return result
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Running totals over a product's active reviews.
+    
+    Kept current by the Review signal handlers in ``review_system.signals``
+    with atomic F() updates; ``manage.py reconcile_rating_summaries`` repairs
+    any drift (e.g. from queryset updates that bypass signals).
+    """
+    product = models.OneToOneField('products.Product', on_delete=models.CASCADE, primary_key=True, related_name='rating_summary')
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    average_rating = models.FloatField(default=0.0)
+    stars_1 = models.IntegerField(default=0)
+    stars_2 = models.IntegerField(default=0)
+    stars_3 = models.IntegerField(default=0)
+    stars_4 = models.IntegerField(default=0)
+    stars_5 = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Product Rating Summary'
+        verbose_name_plural = 'Product Rating Summaries'
+    
+    def __str__(self):
+        return f"Ratings for product {self.product_id}: {self.average_rating:.1f} ({self.review_count})"
+    
+    @property
+    def distribution(self):
+        """(stars, count, percent) for 5 down to 1 stars."""
+        total = self.review_count or 1
+        return [
+            (stars, count, round(count * 100 / total))
+            for stars, count in (
+                (stars, getattr(self, f'stars_{stars}')) for stars in range(5, 0, -1)
+            )
+        ]
+    
+    @classmethod
+    def apply_review(cls, product_id, rating, delta):
+        """Add (``delta=1``) or remove (``delta=-1``) one review's rating from the totals."""
+        star_field = f'stars_{rating}'
+        summary = cls.objects.filter(product_id=product_id)
+        with transaction.atomic():
+            counts = {
+                'review_count': F('review_count') + delta,
+                'rating_sum': F('rating_sum') + delta * rating,
+                star_field: F(star_field) + delta,
+            }
+            if not summary.update(**counts):
+                cls.objects.get_or_create(product_id=product_id)
+                summary.update(**counts)
+            # A second statement so the average sees the updated totals on every backend
+            summary.update(average_rating=Case(
+                When(review_count__gt=0, then=Cast('rating_sum', FloatField()) / F('review_count')),
+                default=Value(0.0),
+            ))
+    
+    @classmethod
+    def reconcile(cls, product_ids):
+        """
+        Recompute the totals of ``product_ids`` from their reviews and fix
+        any rows that differ. Returns the number of summaries repaired.
+        """
+        product_ids = list(product_ids)
+        expected = {
+            product_id: cls(product_id=product_id)
+            for product_id in product_ids
+        }
+        histogram = (
+            Review.objects.filter(product_id__in=product_ids, is_active=True)
+            .values('product_id', 'rating').annotate(count=Count('id'))
+            .values_list('product_id', 'rating', 'count')
+        )
+        for product_id, rating, count in histogram:
+            summary = expected[product_id]
+            setattr(summary, f'stars_{rating}', count)
+            summary.review_count += count
+            summary.rating_sum += rating * count
+        for summary in expected.values():
+            if summary.review_count:
+                summary.average_rating = summary.rating_sum / summary.review_count
+        
+        counters = ['review_count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5']
+        existing = cls.objects.filter(product_id__in=product_ids).in_bulk()
+        stale = [
+            summary for product_id, summary in expected.items()
+            if product_id not in existing
+            or any(getattr(existing[product_id], field) != getattr(summary, field) for field in counters)
+            or abs(existing[product_id].average_rating - summary.average_rating) > 1e-9
+        ]
+        if stale:
+            cls.objects.bulk_create(
+                stale, update_conflicts=True, unique_fields=['product'],
+                update_fields=counters + ['average_rating', 'updated_at'],
+            )
+        return len(stale)
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from products.page_cache import bump_neighbour_review_versions, bump_review_version
+
+from .models import Review, ProductRatingSummary
+
+
+@receiver(post_save, sender=Review)
+def update_rating_summary(sender, instance, created, **kwargs):
+    # _rating_state is what the row contributed before this save (see Review.from_db)
+    old_state = None if created else getattr(instance, '_rating_state', None)
+    new_state = instance.rating_state()
+    if old_state == new_state:
+        return
+    if old_state is not None:
+        ProductRatingSummary.apply_review(*old_state, delta=-1)
+    if new_state is not None:
+        ProductRatingSummary.apply_review(*new_state, delta=1)
+    instance._rating_state = new_state
+    for product_id in {state[0] for state in (old_state, new_state) if state is not None}:
+        _rating_changed(product_id)
+
+
+@receiver(post_delete, sender=Review)
+def remove_from_rating_summary(sender, instance, **kwargs):
+    state = getattr(instance, '_rating_state', None)
+    if state is not None:
+        ProductRatingSummary.apply_review(*state, delta=-1)
+        _rating_changed(state[0])
+
+
+def _rating_changed(product_id):
+    # Related cards on other product pages show this product's rating
+    transaction.on_commit(lambda: bump_neighbour_review_versions(product_id))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_review_fragments(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: bump_review_version(product_id))
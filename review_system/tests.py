@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from products.pagination import encode_cursor
+
+from .feed import REVIEW_ORDERINGS
+from .models import Review
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ReviewFeedTests(TestCase):
+    def setUp(self):
+        from products.models import Brand, Category, Product
+
+        self.product = Product.objects.create(
+            name='Rose Serum', slug='rose-serum', sku='ROSE-1',
+            brand=Brand.objects.create(name='Bloom', slug='bloom'),
+            category=Category.objects.create(name='Serums', slug='serums'),
+            product_type='skincare', description='Rose serum', price=Decimal('900.00'),
+        )
+        user = get_user_model().objects.create_user(username='reviewer', password='secret')
+        self.review = Review.objects.create(user=user, product=self.product, rating=5, title='Lovely', comment='Lovely')
+        self.url = f'/reviews/product/{self.product.id}/reviews/feed/'
+
+    def test_malformed_cursor_returns_first_page(self):
+        cursors = [[None, None, None], [[1], {'a': 1}, 1], ['', '', ''], [True, 1, 1], 'not a list']
+        for sort in REVIEW_ORDERINGS:
+            for values in cursors:
+                with self.subTest(sort=sort, values=values):
+                    response = self.client.get(self.url, {'sort': sort, 'after': encode_cursor(values)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual([review['id'] for review in response.json()['reviews']], [self.review.id])
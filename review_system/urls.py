@@ -5,6 +5,7 @@ app_name = 'review_system'
 
 urlpatterns = [
     path('product/<int:product_id>/reviews/', views.product_reviews, name='product_reviews'),
+    path('product/<int:product_id>/reviews/feed/', views.review_feed, name='review_feed'),
     path('product/<int:product_id>/review/add/', views.add_review, name='add_review'),
     path('review/<int:review_id>/edit/', views.edit_review, name='edit_review'),
     path('review/<int:review_id>/delete/', views.delete_review, name='delete_review'),
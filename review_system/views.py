@@ -2,31 +2,70 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 from .models import Review, ReviewImage, ReviewVote
 from .forms import ReviewForm, ReviewImageForm
 from products.models import Product
-from order_management.models import Order, OrderItem
+from order_management.models import UserProductPurchase
+from .feed import REVIEW_SORT_CHOICES, paginate_reviews
 
 @login_required
 def product_reviews(request, product_id):
     """Display all reviews for a product"""
     product = get_object_or_404(Product, id=product_id, is_active=True)
-    reviews = Review.objects.filter(product=product, is_active=True).order_by('-created_at')
+    page_obj, sort = paginate_reviews(product, request.GET)
     
     # Check if user has purchased this product
-    has_purchased = OrderItem.objects.filter(
-        order__user=request.user,
-        product_sku=product.sku,
-        order__status__in=['completed', 'delivered']
-    ).exists()
+    has_purchased = UserProductPurchase.has_purchased(request.user, product)
     
     context = {
         'product': product,
-        'reviews': reviews,
+        'reviews': page_obj.object_list,
+        'page_obj': page_obj,
+        'sort': sort,
+        'sort_choices': REVIEW_SORT_CHOICES,
         'has_purchased': has_purchased,
+        'rating_summary': product.get_rating_summary(),
     }
     return render(request, 'review_system/product_reviews.html', context)
 
+@require_GET
+def review_feed(request, product_id):
+    """
+    JSON feed of a product's reviews for infinite scrolling.
+    
+    Supports ``sort`` (newest, helpful, rating_high, rating_low), ``per_page``
+    and an ``after`` cursor taken from the previous response's ``next``.
+    """
+    product = get_object_or_404(Product, id=product_id, is_active=True)
+    page_obj, sort = paginate_reviews(product, request.GET)
+    
+    reviews = []
+    for review in page_obj:
+        author = review.user.first_name or review.user.username
+        reviews.append({
+            'id': review.id,
+            'author': author,
+            'author_initial': author[:1].upper(),
+            'rating': review.rating,
+            'rating_label': review.get_rating_label(),
+            'title': review.title,
+            'comment': review.comment,
+            'is_verified_purchase': review.is_verified_purchase,
+            'helpful_votes': review.helpful_votes,
+            'created_at': review.created_at.isoformat(),
+            'images': [
+                {'url': image.image.url, 'caption': image.caption}
+                for image in review.images.all()
+            ],
+        })
+    
+    return JsonResponse({
+        'sort': sort,
+        'reviews': reviews,
+        'next': page_obj.next_cursor,
+    })
+
 @login_required
 def add_review(request, product_id):
     """Add a new review for a product"""
@@ -45,12 +84,7 @@ def add_review(request, product_id):
             review.user = request.user
             review.product = product
             # Check if user has actually purchased this product
-            has_purchased = OrderItem.objects.filter(
-                order__user=request.user,
-                product_sku=product.sku,
-                order__status__in=['completed', 'delivered']
-            ).exists()
-            review.is_verified_purchase = has_purchased
+            review.is_verified_purchase = UserProductPurchase.has_purchased(request.user, product)
             review.save()
             
             messages.success(request, 'Review submitted successfully! Thank you for sharing your thoughts.')
@@ -142,8 +176,8 @@ def vote_review(request, review_id):
                 )
                 action = 'added'
             
-            # Update review helpful votes count
-            review.update_helpful_votes()
+            # The vote updated the count in the database; read the new value
+            review.refresh_from_db(fields=['helpful_votes'])
             
             return JsonResponse({
                 'success': True,
@@ -259,11 +259,13 @@ function performSearch(query) {
         searchResults.innerHTML = '<div class="text-center"><div class="spinner"></div> Searching...</div>';
     }
 
-    fetch(`/search/?q=${encodeURIComponent(query)}`)
-        .then(response => response.text())
-        .then(html => {
+    fetch(`/api/search/?q=${encodeURIComponent(query)}`, {
+        headers: { 'Accept': 'application/json' }
+    })
+        .then(response => response.json())
+        .then(data => {
             if (searchResults) {
-                searchResults.innerHTML = html;
+                searchResults.innerHTML = renderSearchResults(data);
             }
         })
         .catch(error => {
@@ -274,6 +276,36 @@ function performSearch(query) {
         });
 }
 
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+}
+
+function renderSearchResults(data) {
+    if (!data.results.length) {
+        return `<div class="text-center text-muted">No products found for "${escapeHtml(data.query)}"</div>`;
+    }
+
+    const items = data.results.map(product => `
+        <a class="list-group-item list-group-item-action d-flex align-items-center" href="/products/product/${encodeURIComponent(product.slug)}/">
+            ${product.thumbnail
+                ? `<img src="${escapeHtml(product.thumbnail)}" alt="${escapeHtml(product.name)}" width="48" height="48" style="object-fit: cover;" class="me-3 rounded" loading="lazy">`
+                : ''}
+            <div class="flex-grow-1">
+                <div class="fw-semibold">${escapeHtml(product.name)}</div>
+                <small class="text-muted">${escapeHtml(product.brand)}</small>
+            </div>
+            <span class="fw-bold">Rs. ${escapeHtml(product.price)}</span>
+        </a>`).join('');
+
+    const more = data.total > data.results.length
+        ? `<a class="list-group-item list-group-item-action text-center" href="/search/?q=${encodeURIComponent(data.query)}">View all ${data.total} results</a>`
+        : '';
+
+    return `<div class="list-group">${items}${more}</div>`;
+}
+
 // Product image gallery
 function initializeProductGallery() {
     const productImages = document.querySelectorAll('.product-image-thumbnail');
@@ -3,8 +3,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.forms import PasswordChangeForm
+from django.db.models import Prefetch
 from .models import UserProfile, Wishlist
+from dashboard.navbar_counts import navbar_counts_changed
 from order_management.models import Order, ShippingAddress
+from products.models import Product
 
 @login_required
 def user_profile(request):
@@ -131,7 +134,9 @@ def cancel_order(request, order_id):
 @login_required
 def user_wishlist(request):
     """Display user's wishlist"""
-    wishlist_items = Wishlist.objects.filter(user=request.user).order_by('-added_at')
+    wishlist_items = Wishlist.objects.filter(user=request.user).prefetch_related(
+        Prefetch('product', queryset=Product.objects.for_cards())
+    ).order_by('-added_at')
     
     context = {
         'wishlist_items': wishlist_items,
@@ -244,6 +249,7 @@ def remove_from_wishlist(request, product_id):
         wishlist_item = Wishlist.objects.get(user=request.user, product=product)
         wishlist_item.delete()
         messages.success(request, f'{product.name} removed from wishlist!')
+        navbar_counts_changed(request)
     except Wishlist.DoesNotExist:
         messages.error(request, 'Product not found in wishlist!')
     